@@ -1,24 +1,69 @@
 import streamlit as st
 import os
+import time
+import atexit
+import threading
+import asyncio
 import smtplib
 import re
+import html
+import hashlib
+import mmap
+import shutil
+import tempfile
 import mimetypes
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
-from email.mime.base import MIMEBase
-from email import encoders
+from email.message import EmailMessage
 from pathlib import Path
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from string import Template
 from dotenv import load_dotenv
 import groq
-from typing import Optional, Dict, List
+import httpx
+from typing import Optional, Dict, Tuple
+from email_utils import validate_send, send_batch
+from llm_cache import LLMCache
+
+_URL_RE = re.compile(r'(https?://\S+)')
+
+# (maintype, subtype) for the extensions the uploader accepts; anything else
+# falls back to mimetypes, initialized once here rather than on first send
+mimetypes.init()
+_EXT_MAP = {
+    '.txt': ('text', 'plain'),
+    '.pdf': ('application', 'pdf'),
+    '.doc': ('application', 'msword'),
+    '.docx': ('application', 'vnd.openxmlformats-officedocument.wordprocessingml.document'),
+    '.xls': ('application', 'vnd.ms-excel'),
+    '.xlsx': ('application', 'vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    '.jpg': ('image', 'jpeg'),
+    '.jpeg': ('image', 'jpeg'),
+    '.png': ('image', 'png'),
+    '.zip': ('application', 'zip'),
+}
+
+def guess_mime_type(filename):
+    """Return (maintype, subtype) for an attachment filename"""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in _EXT_MAP:
+        return _EXT_MAP[ext]
+    
+    mime_type, _ = mimetypes.guess_type(filename)
+    if mime_type is None:
+        return 'application', 'octet-stream'
+    return tuple(mime_type.split('/', 1))
 
 class GroqAPIClient:
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or os.getenv('GROQ_API_KEY')
         if not self.api_key:
             raise ValueError("Groq API key is required")
-        self.client = groq.Groq(api_key=self.api_key)
+        # Keep connections alive so repeated prompts skip the TCP/TLS handshake
+        limits = httpx.Limits(max_keepalive_connections=20, max_connections=40)
+        self.client = groq.Groq(
+            api_key=self.api_key,
+            http_client=httpx.Client(timeout=30.0, limits=limits, transport=httpx.HTTPTransport(retries=2))
+        )
         self.default_model = "llama-3.1-8b-instant"
         
     def send_prompt(self, prompt: str, temperature: float = 0.7) -> str:
@@ -32,27 +77,160 @@ class GroqAPIClient:
         except Exception as e:
             raise Exception(f"Failed to get response from Groq API: {str(e)}")
 
-def build_prompt(key_points: List[str], tone: str, context: str) -> str:
-    prompt = f"""Write a professional email with the following key points:
-{chr(10).join('- ' + point for point in key_points)}
+    def stream_prompt(self, prompt: str, model: str, max_tokens: int, temperature: float = 0.7):
+        """Stream a reply on the pooled client; each chunk's text is in choices[0].delta.content"""
+        return self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+
+    async def send_prompt_async(self, prompt: str, temperature: float = 0.7) -> str:
+        # Runs the pooled sync client on a worker thread: this client is cached for the
+        # whole process, and an async client's connections would stay tied to the
+        # event loop of the first asyncio.run that opened them
+        return await asyncio.to_thread(self.send_prompt, prompt, temperature)
+
+@dataclass(frozen=True)
+class Settings:
+    groq_key: Optional[str]
+    smtp_password: Optional[str]
+    smtp_host: Optional[str]
+    smtp_port: Optional[int]
+
+def _secret(name):
+    # st.secrets raises rather than returning None when there is no secrets file
+    try:
+        return st.secrets.get(name)
+    except FileNotFoundError:
+        return None
+
+@st.cache_resource(show_spinner=False)
+def get_settings():
+    """Read API keys and SMTP settings once; cleared by the sidebar's reload button"""
+    smtp_port = _secret("SMTP_PORT")
+    return Settings(
+        groq_key=os.getenv("GROQ_API_KEY"),
+        smtp_password=os.getenv("SMTP_PASSWORD"),
+        smtp_host=_secret("SMTP_HOST"),
+        smtp_port=int(smtp_port) if smtp_port else None
+    )
+
+@st.cache_resource(show_spinner=False)
+def get_groq_client():
+    """Create the Groq client once per server process"""
+    return GroqAPIClient(api_key=get_settings().groq_key)
+
+@st.cache_data(show_spinner=False)
+def get_css(path):
+    """Read a CSS file once instead of on every rerun"""
+    return Path(path).read_text()
+
+# Sampling above this temperature is too random for a stored reply to stand in for a new one
+CACHE_MAX_TEMPERATURE = 0.3
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache():
+    """Exact-match reply cache shared by all sessions"""
+    return LLMCache(max_entries=512, default_ttl=3600.0)
+
+def generate_email(prompt: str, model: str, max_tokens: int, temperature: float, placeholder) -> str:
+    """Generate a reply, streaming tokens into placeholder unless an identical request is cached"""
+    cacheable = temperature <= CACHE_MAX_TEMPERATURE
+    key = hashlib.blake2b(f"{model}\0{max_tokens}\0{temperature}\0{prompt}".encode(), digest_size=16).hexdigest()
+    if cacheable:
+        response = get_response_cache().get(key)
+        if response is not None:
+            placeholder.markdown(response)
+            return response
+    
+    with placeholder.container():
+        response = st.write_stream(
+            chunk.choices[0].delta.content or ""
+            for chunk in get_groq_client().stream_prompt(prompt, model, max_tokens, temperature)
+        )
+    
+    if cacheable and response:
+        get_response_cache().set(key, response)
+    return response
+
+_EMAIL_CARD = Template("""
+<div style="background: rgba(255, 255, 255, 0.95); color: #2d3748; padding: 1.5rem; border-radius: 12px; margin: 1rem 0; font-family: 'Inter', sans-serif;">
+    <div style="border-bottom: 1px solid #e2e8f0; margin-bottom: 1rem; padding-bottom: 1rem;">
+        <strong style="color: #4a5568">From:</strong> $sender<br>
+        <strong style="color: #4a5568">To:</strong> $receiver<br>
+        <strong style="color: #4a5568">Subject:</strong> $subject
+    </div>
+    <div style="white-space: pre-wrap;">$body</div>
+</div>
+""")
+
+@st.cache_data(show_spinner=False)
+def render_email_card(sender: str, receiver: str, subject: str, body: str) -> str:
+    """Render the generated email preview, escaping every field since it is injected as HTML"""
+    return _EMAIL_CARD.substitute(
+        sender=html.escape(sender),
+        receiver=html.escape(receiver),
+        subject=html.escape(subject),
+        body=html.escape(body)
+    )
 
-Tone: {tone}
-Additional Context: {context}
+_PROMPT_TMPL = Template("""Write a professional email with the following key points:
+$points
 
-Please write a complete, well-structured email incorporating these points."""
-    return prompt
+Tone: $tone
+Additional Context: $context
 
-def evaluate_email(email_text: str, key_points: List[str]) -> Dict[str, any]:
+Please write a complete, well-structured email incorporating these points.""")
+
+# Reruns with unchanged inputs reuse the prompt built last time
+@st.cache_data(max_entries=128, show_spinner=False)
+def build_prompt(key_points: Tuple[str, ...], tone: str, context: str) -> str:
+    bullets = "\n".join(f"- {point}" for point in key_points)
+    return _PROMPT_TMPL.substitute(points=bullets, tone=tone, context=context)
+
+def build_subject_prompt(email_text: str) -> str:
+    return f"""Suggest one concise subject line for the following email. Reply with the subject line only.
+
+{email_text}"""
+
+async def analyze_draft(draft: str, key_points: Tuple[str, ...]):
+    """Evaluate a draft while a subject line suggestion is generated"""
+    eval_task = asyncio.to_thread(evaluate_email, draft, key_points)
+    subject_task = groq_client.send_prompt_async(build_subject_prompt(draft), 0.3)
+    return await asyncio.gather(eval_task, subject_task, return_exceptions=True)
+
+def evaluate_email(email_text: str, key_points: Tuple[str, ...]) -> Dict[str, any]:
     """Simple email evaluation"""
+    # Lowercase and count words once, then check every point against the same text
+    lowered = email_text.lower()
+    word_count = len(email_text.split())
+    
+    found_points = []
+    missing_points = []
+    for point in key_points:
+        if point.lower() in lowered:
+            found_points.append(point)
+        else:
+            missing_points.append(point)
+    
+    all_points_covered = not missing_points
     evaluation = {
-        "completeness": all(point.lower() in email_text.lower() for point in key_points),
-        "length": len(email_text.split()),
+        "completeness": all_points_covered,
+        "all_points_covered": all_points_covered,
+        "coverage_percentage": 100.0 * len(found_points) / len(key_points) if key_points else 100.0,
+        "found_points": found_points,
+        "missing_points": missing_points,
+        "all_points": list(key_points),
+        "length": word_count,
         "suggestions": []
     }
     
-    if evaluation["length"] < 50:
+    if word_count < 50:
         evaluation["suggestions"].append("Consider adding more detail")
-    elif evaluation["length"] > 500:
+    elif word_count > 500:
         evaluation["suggestions"].append("Consider making the email more concise")
         
     return evaluation
@@ -61,7 +239,7 @@ def evaluate_email(email_text: str, key_points: List[str]) -> Dict[str, any]:
 load_dotenv()
 
 # Initialize Groq client
-groq_client = GroqAPIClient()
+groq_client = get_groq_client()
 
 # Set page config
 st.set_page_config(
@@ -72,8 +250,7 @@ st.set_page_config(
 )
 
 # Load custom CSS
-with open('style.css') as f:
-    st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+st.markdown(f'<style>{get_css("style.css")}</style>', unsafe_allow_html=True)
 
 # Add Google Fonts
 st.markdown('''
@@ -83,6 +260,29 @@ st.markdown('''
 # Initialize session state for attachments
 if 'attachments' not in st.session_state:
     st.session_state.attachments = []
+st.session_state.setdefault('attachment_names', set())
+st.session_state.setdefault('attachments_total_size', 0)
+
+# Drafts queued to be sent together over one SMTP session
+st.session_state.setdefault('outbox', [])
+
+# Attachment payloads live on disk; session state only keeps their paths
+if 'attach_dir' not in st.session_state:
+    st.session_state.attach_dir = tempfile.mkdtemp(prefix="smartoffice_attachments_")
+    atexit.register(shutil.rmtree, st.session_state.attach_dir, ignore_errors=True)
+
+def _add_attachment(file_info):
+    """Record an attachment, keeping the name set and running total size in step"""
+    st.session_state.attachments.append(file_info)
+    st.session_state.attachment_names.add(file_info['name'])
+    st.session_state.attachments_total_size += file_info['size']
+
+def _remove_attachment(idx):
+    """Drop the attachment at idx and delete its spilled file"""
+    removed = st.session_state.attachments.pop(idx)
+    st.session_state.attachment_names.discard(removed['name'])
+    st.session_state.attachments_total_size -= removed['size']
+    Path(removed['path']).unlink(missing_ok=True)
 
 def handle_uploaded_file(uploaded_file):
     """Process an uploaded file and add it to session state"""
@@ -91,286 +291,453 @@ def handle_uploaded_file(uploaded_file):
         if uploaded_file.size > 10 * 1024 * 1024:
             return False, "File size exceeds 10MB limit"
         
+        # Add to session state if not already present
+        if uploaded_file.name in st.session_state.attachment_names:
+            return False, "File already attached"
+        
+        # Spill the payload to disk in 1MB chunks; never materialize it with getvalue()
+        uploaded_file.seek(0)
+        with tempfile.NamedTemporaryFile(delete=False, dir=st.session_state.attach_dir) as fh:
+            while chunk := uploaded_file.read(1 << 20):
+                fh.write(chunk)
+        
         # Save file info to session state
         file_info = {
             'name': uploaded_file.name,
             'type': uploaded_file.type,
-            'size': uploaded_file.size,
-            'data': uploaded_file.getvalue()
+            'size': os.path.getsize(fh.name),
+            'mime': guess_mime_type(uploaded_file.name),
+            'path': fh.name
         }
-        
-        # Add to session state if not already present
-        if not any(f['name'] == file_info['name'] for f in st.session_state.attachments):
-            st.session_state.attachments.append(file_info)
-            return True, f"Added {uploaded_file.name}"
-        
-        return False, "File already attached"
+        _add_attachment(file_info)
+        return True, f"Added {uploaded_file.name}"
     
     return False, "No file provided"
 
-def is_valid_email(email):
-    """Validate email address format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
-
-def get_email_template(template_name="default"):
-    """Get predefined email templates"""
-    templates = {
-        "newsletter": {
-            "html": """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <style>
-                    body { font-family: 'Segoe UI', sans-serif; line-height: 1.6; color: #333; }
-                    .container { max-width: 600px; margin: 0 auto; padding: 20px; }
-                    .header { background: #2196F3; color: white; padding: 30px; text-align: center; border-radius: 5px 5px 0 0; }
-                    .content { background: #fff; padding: 30px; border: 1px solid #e0e0e0; }
-                    .footer { text-align: center; padding: 20px; font-size: 12px; color: #666; }
-                    .button { display: inline-block; padding: 10px 20px; background: #2196F3; color: white; text-decoration: none; border-radius: 5px; }
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>{header}</h1>
-                    </div>
-                    <div class="content">
-                        {content}
-                    </div>
-                    <div class="footer">
-                        {footer}
-                    </div>
+_TEMPLATES = {
+    "newsletter": {
+        "html": """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <style>
+                body { font-family: 'Segoe UI', sans-serif; line-height: 1.6; color: #333; }
+                .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+                .header { background: #2196F3; color: white; padding: 30px; text-align: center; border-radius: 5px 5px 0 0; }
+                .content { background: #fff; padding: 30px; border: 1px solid #e0e0e0; }
+                .footer { text-align: center; padding: 20px; font-size: 12px; color: #666; }
+                .button { display: inline-block; padding: 10px 20px; background: #2196F3; color: white; text-decoration: none; border-radius: 5px; }
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <h1>$header</h1>
                 </div>
-            </body>
-            </html>
-            """,
-            "plain": "{header}\n\n{content}\n\n{footer}"
-        },
-        "meeting": {
-            "html": """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <style>
-                    body { font-family: 'Calibri', sans-serif; line-height: 1.5; color: #2c3e50; }
-                    .container { max-width: 600px; margin: 0 auto; padding: 20px; }
-                    .calendar-box { background: #ecf0f1; padding: 20px; border-left: 4px solid #3498db; margin: 20px 0; }
-                    .details { background: #fff; padding: 20px; border: 1px solid #bdc3c7; margin-top: 20px; }
-                    .button { background: #3498db; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px; }
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <h2>{header}</h2>
-                    <div class="calendar-box">
-                        {content}
-                    </div>
-                    <div class="details">
-                        {footer}
-                    </div>
+                <div class="content">
+                    $content
                 </div>
-            </body>
-            </html>
-            """,
-            "plain": "{header}\n\n{content}\n\n{footer}"
-        },
-        "thank_you": {
-            "html": """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <style>
-                    body { font-family: 'Georgia', serif; line-height: 1.8; color: #2c3e50; }
-                    .container { max-width: 600px; margin: 0 auto; padding: 30px; }
-                    .message { text-align: center; padding: 40px 20px; }
-                    .signature { margin-top: 40px; font-style: italic; }
-                    h1 { color: #e74c3c; }
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="message">
-                        <h1>{header}</h1>
-                        <div class="content">
-                            {content}
-                        </div>
-                        <div class="signature">
-                            {footer}
-                        </div>
-                    </div>
+                <div class="footer">
+                    $footer
                 </div>
-            </body>
-            </html>
-            """,
-            "plain": "{header}\n\n{content}\n\n{footer}"
-        },
-        "default": {
-            "html": """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <style>
-                    body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
-                    .email-container { max-width: 600px; margin: 0 auto; padding: 20px; }
-                    .email-header { margin-bottom: 20px; }
-                    .email-content { background: #fff; padding: 20px; border-radius: 5px; }
-                    .email-footer { margin-top: 20px; font-size: 12px; color: #666; }
-                </style>
-            </head>
-            <body>
-                <div class="email-container">
-                    <div class="email-header">
-                        {header}
-                    </div>
-                    <div class="email-content">
-                        {content}
-                    </div>
-                    <div class="email-footer">
-                        {footer}
-                    </div>
+            </div>
+        </body>
+        </html>
+        """,
+        "plain": "$header\n\n$content\n\n$footer"
+    },
+    "meeting": {
+        "html": """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <style>
+                body { font-family: 'Calibri', sans-serif; line-height: 1.5; color: #2c3e50; }
+                .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+                .calendar-box { background: #ecf0f1; padding: 20px; border-left: 4px solid #3498db; margin: 20px 0; }
+                .details { background: #fff; padding: 20px; border: 1px solid #bdc3c7; margin-top: 20px; }
+                .button { background: #3498db; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px; }
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <h2>$header</h2>
+                <div class="calendar-box">
+                    $content
                 </div>
-            </body>
-            </html>
-            """,
-            "plain": "{header}\n\n{content}\n\n{footer}"
-        },
-        "formal": {
-            "html": """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <style>
-                    body { font-family: 'Times New Roman', serif; line-height: 1.8; color: #1a1a1a; }
-                    .email-container { max-width: 600px; margin: 0 auto; padding: 30px; }
-                    .email-header { border-bottom: 2px solid #1a1a1a; padding-bottom: 20px; margin-bottom: 30px; }
-                    .email-content { text-align: justify; }
-                    .signature { margin-top: 40px; }
-                </style>
-            </head>
-            <body>
-                <div class="email-container">
-                    <div class="email-header">
-                        {header}
-                    </div>
-                    <div class="email-content">
-                        {content}
+                <div class="details">
+                    $footer
+                </div>
+            </div>
+        </body>
+        </html>
+        """,
+        "plain": "$header\n\n$content\n\n$footer"
+    },
+    "thank_you": {
+        "html": """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <style>
+                body { font-family: 'Georgia', serif; line-height: 1.8; color: #2c3e50; }
+                .container { max-width: 600px; margin: 0 auto; padding: 30px; }
+                .message { text-align: center; padding: 40px 20px; }
+                .signature { margin-top: 40px; font-style: italic; }
+                h1 { color: #e74c3c; }
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="message">
+                    <h1>$header</h1>
+                    <div class="content">
+                        $content
                     </div>
                     <div class="signature">
-                        {footer}
+                        $footer
                     </div>
                 </div>
-            </body>
-            </html>
-            """,
-            "plain": "{header}\n\n{content}\n\n{footer}"
-        }
+            </div>
+        </body>
+        </html>
+        """,
+        "plain": "$header\n\n$content\n\n$footer"
+    },
+    "default": {
+        "html": """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <style>
+                body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+                .email-container { max-width: 600px; margin: 0 auto; padding: 20px; }
+                .email-header { margin-bottom: 20px; }
+                .email-content { background: #fff; padding: 20px; border-radius: 5px; }
+                .email-footer { margin-top: 20px; font-size: 12px; color: #666; }
+            </style>
+        </head>
+        <body>
+            <div class="email-container">
+                <div class="email-header">
+                    $header
+                </div>
+                <div class="email-content">
+                    $content
+                </div>
+                <div class="email-footer">
+                    $footer
+                </div>
+            </div>
+        </body>
+        </html>
+        """,
+        "plain": "$header\n\n$content\n\n$footer"
+    },
+    "formal": {
+        "html": """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <style>
+                body { font-family: 'Times New Roman', serif; line-height: 1.8; color: #1a1a1a; }
+                .email-container { max-width: 600px; margin: 0 auto; padding: 30px; }
+                .email-header { border-bottom: 2px solid #1a1a1a; padding-bottom: 20px; margin-bottom: 30px; }
+                .email-content { text-align: justify; }
+                .signature { margin-top: 40px; }
+            </style>
+        </head>
+        <body>
+            <div class="email-container">
+                <div class="email-header">
+                    $header
+                </div>
+                <div class="email-content">
+                    $content
+                </div>
+                <div class="signature">
+                    $footer
+                </div>
+            </div>
+        </body>
+        </html>
+        """,
+        "plain": "$header\n\n$content\n\n$footer"
     }
-    return templates.get(template_name, templates["default"])
+}
+
+# Precompile each template once so send_email only substitutes values
+for _template in _TEMPLATES.values():
+    _template["html_tmpl"] = Template(_template["html"])
+    _template["plain_tmpl"] = Template(_template["plain"])
+
+def get_email_template(template_name="default"):
+    """Get predefined email templates"""
+    return _TEMPLATES.get(template_name, _TEMPLATES["default"])
 
 def convert_to_html(text):
     """Convert plain text to HTML with basic formatting"""
-    # Replace newlines with HTML breaks
-    text = text.replace('\n', '<br>')
+    # Link URLs and break lines paragraph by paragraph in a single pass.
+    # Linking before adding <br> keeps a line break out of the URL.
+    return ''.join(
+        '<p>' + _URL_RE.sub(r'<a href="\1">\1</a>', paragraph).replace('\n', '<br>') + '</p>'
+        for paragraph in text.split('\n\n')
+    )
+
+_PROVIDERS = {
+    "gmail": ("smtp.gmail.com", 587),
+    "outlook": ("smtp-mail.outlook.com", 587),
+    "yahoo": ("smtp.mail.yahoo.com", 587)
+}
+
+# Recycle pooled SMTP sessions before providers drop them
+_SMTP_IDLE_TIMEOUT = 100  # seconds
+_SMTP_MAX_MESSAGES = 100
+
+class SMTPSessionPool:
+    """Keep one authenticated SMTP session per (provider, sender) across send_email calls"""
+
+    def __init__(self, sessions, lock):
+        # Held directly rather than looked up in st.session_state so that
+        # background send threads can use the pool too
+        self.sessions = sessions
+        self.lock = lock
+
+    def get(self, address, sender, password):
+        """Return a live SMTP session, reconnecting if the cached one went stale"""
+        key = (address, sender)
+        entry = self.sessions.get(key)
+
+        if entry is not None:
+            idle = time.monotonic() - entry['last_used']
+            if idle < _SMTP_IDLE_TIMEOUT and entry['sent'] < _SMTP_MAX_MESSAGES:
+                try:
+                    code, _ = entry['server'].noop()
+                    if code == 250:
+                        return entry['server']
+                except (smtplib.SMTPException, OSError):
+                    pass
+            self.discard(address, sender)
+
+        # Create and authenticate a new SMTP session
+        server = smtplib.SMTP(*address, timeout=30)
+        server.starttls()
+        server.login(sender, password)
+        self.sessions[key] = {'server': server, 'last_used': time.monotonic(), 'sent': 0}
+        return server
+
+    def send(self, address, sender, password, message):
+        """Send a message on the pooled session, reconnecting once if the server dropped it"""
+        # One SMTP conversation at a time per session; sends may come from worker threads
+        with self.lock:
+            try:
+                self.get(address, sender, password).send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                self.discard(address, sender)
+                self.get(address, sender, password).send_message(message)
+
+            entry = self.sessions[(address, sender)]
+            entry['last_used'] = time.monotonic()
+            entry['sent'] += 1
+
+    def discard(self, address, sender):
+        """Drop a cached session, closing it if still open"""
+        entry = self.sessions.pop((address, sender), None)
+        if entry is not None:
+            _quit(entry['server'])
+
+def _quit(server):
+    try:
+        server.quit()
+    except (smtplib.SMTPException, OSError):
+        server.close()
+
+def close_smtp_sessions(sessions):
+    """Quit every SMTP session in a pool"""
+    for entry in sessions.values():
+        _quit(entry['server'])
+    sessions.clear()
+
+def get_smtp_pool():
+    """Return this user session's SMTP pool, creating it on first use"""
+    if '_smtp_pool' not in st.session_state:
+        st.session_state['_smtp_pool'] = {}
+        st.session_state['_smtp_lock'] = threading.RLock()
+        # Close this session's connections when the server shuts down
+        atexit.register(close_smtp_sessions, st.session_state['_smtp_pool'])
+    return SMTPSessionPool(st.session_state['_smtp_pool'], st.session_state['_smtp_lock'])
+
+smtp_pool = get_smtp_pool()
+
+@st.cache_resource(show_spinner=False)
+def get_send_executor():
+    """Bounded worker pool for background email sends, shared by all sessions"""
+    return ThreadPoolExecutor(max_workers=4)
+
+def build_email_message(sender_email, receiver_email, subject, body, template="default", attachments=None):
+    """Build a multipart HTML/plain-text email from a template, with attachments"""
+    # Create message
+    message = EmailMessage()
+    message['From'] = sender_email
+    message['To'] = receiver_email
+    message['Subject'] = subject
+    
+    # Get template
+    template = get_email_template(template)
+    
+    # Create plain text version
+    text_content = template["plain_tmpl"].substitute(
+        header=f"Subject: {subject}",
+        content=body,
+        footer=f"Sent by {sender_email}"
+    )
     
-    # Convert URLs to links
-    url_pattern = r'(https?://\S+)'
-    text = re.sub(url_pattern, r'<a href="\1">\1</a>', text)
+    # Create HTML version
+    html_content = template["html_tmpl"].substitute(
+        header=f"<h2>{subject}</h2>",
+        content=convert_to_html(body),
+        footer=f"<em>Sent by {sender_email}</em>"
+    )
     
-    # Add basic paragraph formatting
-    paragraphs = text.split('<br><br>')
-    text = ''.join([f'<p>{p}</p>' for p in paragraphs])
+    # Attach both plain and HTML versions
+    message.set_content(text_content)
+    message.add_alternative(html_content, subtype='html')
     
-    return text
+    # Attach files
+    if attachments:
+        for attachment in attachments:
+            maintype, subtype = attachment['mime']
+            
+            # Base64 straight from a read-only mapping of the spilled file, without
+            # first copying it into a bytes object (mmap rejects empty files)
+            with open(attachment['path'], 'rb') as fh:
+                if os.fstat(fh.fileno()).st_size == 0:
+                    message.add_attachment(b'', maintype=maintype, subtype=subtype, filename=attachment['name'])
+                    continue
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as data:
+                    message.add_attachment(data, maintype=maintype, subtype=subtype, filename=attachment['name'])
+    
+    return message
 
-def send_email(sender_email, receiver_email, subject, body, smtp_password, provider="gmail", template="default", attachments=None):
-    """Send email using SMTP with HTML support and templates"""
+def smtp_address(provider, smtp_server=None):
+    """(host, port) for a provider; smtp_server is used for the "custom" provider"""
+    if provider == "custom":
+        return smtp_server
+    return _PROVIDERS.get(provider, _PROVIDERS["gmail"])
+
+def send_email(sender_email, receiver_email, subject, body, smtp_password, provider="gmail", template="default", attachments=None, smtp_server=None):
+    """Send email using SMTP with HTML support and templates.
+
+    smtp_server is the (host, port) to use for the "custom" provider.
+    """
     try:
-        # Create message
-        message = MIMEMultipart('alternative')
-        message['From'] = sender_email
-        message['To'] = receiver_email
-        message['Subject'] = subject
-        
-        # Get template
-        template = get_email_template(template)
+        message = build_email_message(sender_email, receiver_email, subject, body, template, attachments)
         
-        # Create plain text version
-        text_content = template["plain"].format(
-            header=f"Subject: {subject}",
-            content=body,
-            footer=f"Sent by {sender_email}"
-        )
-        
-        # Create HTML version
-        html_content = template["html"].format(
-            header=f"<h2>{subject}</h2>",
-            content=convert_to_html(body),
-            footer=f"<em>Sent by {sender_email}</em>"
-        )
-        
-        # Attach both plain and HTML versions
-        message.attach(MIMEText(text_content, 'plain'))
-        message.attach(MIMEText(html_content, 'html'))
-        
-        # Attach files
-        if attachments:
-            for attachment in attachments:
-                mime_type, _ = mimetypes.guess_type(attachment['name'])
-                if mime_type is None:
-                    mime_type = 'application/octet-stream'
-                
-                maintype, subtype = mime_type.split('/', 1)
-                
-                if maintype == 'text':
-                    att = MIMEText(attachment['data'].decode('utf-8'), _subtype=subtype)
-                elif maintype == 'application':
-                    att = MIMEApplication(attachment['data'], _subtype=subtype)
-                else:
-                    att = MIMEBase(maintype, subtype)
-                    att.set_payload(attachment['data'])
-                    encoders.encode_base64(att)
-                
-                att.add_header('Content-Disposition', 'attachment', filename=attachment['name'])
-                message.attach(att)
-        
-        # Provider settings
-        providers = {
-            "gmail": ("smtp.gmail.com", 587),
-            "outlook": ("smtp-mail.outlook.com", 587),
-            "yahoo": ("smtp.mail.yahoo.com", 587),
-            "custom": (st.secrets.get("SMTP_HOST", ""), st.secrets.get("SMTP_PORT", 587))
-        }
-        
-        smtp_host, smtp_port = providers.get(provider, providers["gmail"])
-        
-        # Create SMTP session
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(sender_email, smtp_password)
-            text = message.as_string()
-            server.sendmail(sender_email, receiver_email, text)
+        # Reuse the pooled SMTP session for this sender
+        smtp_pool.send(smtp_address(provider, smtp_server), sender_email, smtp_password, message)
             
         return True, "Email sent successfully!"
     except Exception as e:
         return False, f"Failed to send email: {str(e)}"
 
-# Load environment variables
-load_dotenv()
+def send_email_batch(messages):
+    """Send several emails, one SMTP session per server and sender.
 
-# Initialize Groq client
-groq_client = GroqAPIClient()
+    Each item in messages is a dict of send_email keyword arguments. Results are
+    returned in the same order as messages.
+    """
+    results = [None] * len(messages)
+    groups = {}
+    
+    for index, kwargs in enumerate(messages):
+        try:
+            message = build_email_message(
+                kwargs['sender_email'],
+                kwargs['receiver_email'],
+                kwargs['subject'],
+                kwargs['body'],
+                kwargs.get('template', 'default'),
+                kwargs.get('attachments')
+            )
+        except Exception as e:
+            results[index] = (False, f"Failed to send email: {str(e)}")
+            continue
+        address = smtp_address(kwargs.get('provider', 'gmail'), kwargs.get('smtp_server'))
+        key = (address, kwargs['sender_email'], kwargs['smtp_password'])
+        groups.setdefault(key, []).append((index, message))
+    
+    for (address, sender, password), batch in groups.items():
+        sent = send_batch(smtp_pool, address, sender, password, [message for _, message in batch])
+        for (index, _), result in zip(batch, sent):
+            results[index] = result
+    
+    return results
 
-# Set page config for better appearance
-st.set_page_config(
-    page_title="Smart Office Assistant",
-    page_icon="🤖",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+def _sends_pending():
+    return 'send_job' in st.session_state or 'outbox_job' in st.session_state
+
+def send_status():
+    """Report background sends, polling every second only while one is outstanding"""
+    # Wrapped on each full rerun, so polling starts with a send and stops once none is left
+    st.fragment(run_every=1.0 if _sends_pending() else None)(_send_status_panel)()
+
+def _send_status_panel():
+    # Collect finished jobs; their results stay on screen until the next send
+    finished = False
+    if 'send_job' in st.session_state:
+        future, sent_template = st.session_state.send_job
+        if future.done():
+            del st.session_state['send_job']
+            st.session_state.send_result = future.result()
+            if st.session_state.send_result[0]:
+                # Save successful template for future use
+                st.session_state['last_template'] = sent_template
+            finished = True
+    
+    if 'outbox_job' in st.session_state and st.session_state.outbox_job.done():
+        st.session_state.outbox_result = st.session_state.pop('outbox_job').result()
+        finished = True
+    
+    if finished and not _sends_pending():
+        # A full rerun redraws the results and rebuilds the fragment without polling
+        st.rerun()
+    
+    if 'send_job' in st.session_state:
+        with st.status("📤 Sending email...", state="running"):
+            st.write("The result will appear here once your provider responds.")
+    elif 'send_result' in st.session_state:
+        success, message = st.session_state.send_result
+        if success:
+            st.success(message)
+        else:
+            st.error(message)
+    
+    # Queued drafts are sent together on one SMTP session per sender
+    if 'outbox_job' in st.session_state:
+        with st.status("📤 Sending outbox...", state="running"):
+            st.write("The results will appear here once your provider responds.")
+        return
+    
+    if 'outbox_result' in st.session_state:
+        results = st.session_state.outbox_result
+        sent = sum(success for success, _ in results)
+        if sent == len(results):
+            st.success(f"✅ Sent {sent} queued email(s)")
+        else:
+            st.warning(f"⚠️ Sent {sent} of {len(results)} queued emails")
+            for success, message in results:
+                if not success:
+                    st.error(message)
+    
+    if st.session_state.outbox and st.button(f"📤 Send Outbox ({len(st.session_state.outbox)})"):
+        st.session_state.outbox_job = get_send_executor().submit(send_email_batch, st.session_state.outbox)
+        st.session_state.outbox = []
+        st.session_state.pop('outbox_result', None)
+        # A full rerun rebuilds the fragment with polling switched on
+        st.rerun()
 
 # Custom CSS for modern lovable design with proper text colors
-st.markdown("""
+_APP_CSS = """
 <style>
     /* Engaging button styling */
     .stButton > button {
@@ -396,32 +763,7 @@ st.markdown("""
     .stButton > button:active {
         transform: translateY(0) !important;
         box-shadow: 0 2px 8px rgba(76, 175, 80, 0.2) !important;
-    } Load environment variables
-load_dotenv()
-
-# Initialize Groq client
-groq_client = GroqAPIClient()
-
-# Set page config for better appearance
-st.set_page_config(
-    page_title="Smart Office Assistant",
-    page_icon="🤖",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Load custom CSS
-def load_css(file_name):
-    with open(file_name) as f:
-        st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
-
-# Load the custom CSS file
-load_css('style.css')
-
-# Add Google Fonts
-st.markdown('''
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap" rel="stylesheet">
-    ''', unsafe_allow_html=True)
+    }
     
     /* Global Styles */
     div.stApp {
@@ -712,7 +1054,9 @@ st.markdown('''
         z-index: -1;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(_APP_CSS, unsafe_allow_html=True)
 
 # Main header
 st.markdown("""
@@ -783,12 +1127,14 @@ with st.container():
             )
             
             # Key points
-            key_points = st.text_area(
+            key_points_raw = st.text_area(
                 "📝 Key Points",
-                placeholder="Enter the main points you want to include in your email...",
+                placeholder="Enter the main points you want to include in your email, one per line...",
                 height=100,
                 help="List the important topics or messages you want to convey"
             )
+            # One point per non-blank line; a tuple so prompt and evaluation caches can key on it
+            key_points = tuple(p.strip() for p in key_points_raw.splitlines() if p.strip())
             
             # Tone selection
             tone = st.selectbox(
@@ -858,20 +1204,19 @@ with st.container():
                 else:
                     st.error(message)
             
-            # Show current attachments
-            if st.session_state.attachments:
-                st.write("📁 Current Attachments:")
-                for idx, attachment in enumerate(st.session_state.attachments):
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.text(f"{attachment['name']} ({attachment['size'] / 1024:.1f} KB)")
-                    with col2:
-                        if st.button("❌", key=f"remove_{idx}"):
-                            st.session_state.attachments.pop(idx)
-                            st.experimental_rerun()
-            
             # Submit button
             submitted = st.form_submit_button("🚀 Generate Email", use_container_width=True)
+        
+        # Show current attachments; outside the form, since st.button is not allowed in one
+        if st.session_state.attachments:
+            st.write("📁 Current Attachments:")
+            for idx, attachment in enumerate(st.session_state.attachments):
+                col_name, col_remove = st.columns([3, 1])
+                with col_name:
+                    st.text(f"{attachment['name']} ({attachment['size'] / 1024:.1f} KB)")
+                with col_remove:
+                    # Removed in the click's callback, before the list is drawn again
+                    st.button("❌", key=f"remove_{idx}", on_click=_remove_attachment, args=(idx,))
     
     with col2:
         st.subheader("💡 Tips")
@@ -899,129 +1244,151 @@ with st.container():
 
 # Process form submission
 if submitted:
-    # Retrieve sidebar selections for email_provider and email_template
-    email_provider = st.session_state.get("email_provider") if "email_provider" in st.session_state else "gmail"
-    email_template = st.session_state.get("email_template") if "email_template" in st.session_state else "default"
-
     if not sender_email or not receiver_email or not subject or not key_points:
         st.warning("⚠️ Please fill in all required fields (From, To, Subject, and Key Points).")
     else:
         with st.spinner("🤖 Generating your email..."):
             try:
                 # Build the prompt with additional context
-                email_context = f"""
-                From: {sender_email}
-                To: {receiver_email}
-                Subject: {subject}
-                
-                Additional Context: {context}
-                """
+                email_context = f"From: {sender_email}\nTo: {receiver_email}\nSubject: {subject}"
+                if context:
+                    email_context += f"\n\n{context}"
                 
                 # Build the prompt
                 prompt = build_prompt(key_points, tone, email_context)
                 
-                # Generate the reply
-                response = groq_client.send_prompt(prompt)
+                model = st.session_state.get("model", groq_client.default_model)
+                max_tokens = st.session_state.get("max_tokens", 1000)
                 
-                if response:
-                    # Evaluate the reply
-                    evaluation = evaluate_email(response, key_points)
-                    
-                    # Display results
-                    st.markdown('<div class="main-card">', unsafe_allow_html=True)
-                    st.subheader("📧 Generated Email")
-                    
-                    # Show the generated email in email format
-                    st.markdown(f"""
-                    <div style="background: rgba(255, 255, 255, 0.95); color: #2d3748; padding: 1.5rem; border-radius: 12px; margin: 1rem 0; font-family: 'Inter', sans-serif;">
-                        <div style="border-bottom: 1px solid #e2e8f0; margin-bottom: 1rem; padding-bottom: 1rem;">
-                            <strong style="color: #4a5568">From:</strong> {sender_email}<br>
-                            <strong style="color: #4a5568">To:</strong> {receiver_email}<br>
-                            <strong style="color: #4a5568">Subject:</strong> {subject}
-                        </div>
-                        <div style="white-space: pre-wrap;">
-                            {response}
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Add send button
-                    col_edit, col_send = st.columns([3, 1])
-                    with col_edit:
-                        edited_email = st.text_area(
-                            "✏️ Edit Email",
-                            value=response,
-                            height=300
-                        )
-                    with col_send:
-                        if st.button("📧 Send Email"):
-                            smtp_password = os.getenv('SMTP_PASSWORD')
-                            if not smtp_password:
-                                st.error("❌ SMTP Password not configured. Please add SMTP_PASSWORD to your .env file.")
-                            else:
-                                # Validate email addresses
-                                if not is_valid_email(sender_email):
-                                    st.error("❌ Invalid sender email address format.")
-                                elif not is_valid_email(receiver_email):
-                                    st.error("❌ Invalid recipient email address format.")
-                                else:
-                                    # Custom SMTP validation
-                                    if email_provider == "custom" and not (st.secrets.get("SMTP_HOST") and st.secrets.get("SMTP_PORT")):
-                                        st.error("❌ Custom SMTP settings are not configured.")
-                                    else:
-                                        # Show sending indicator
-                                        with st.spinner("📤 Sending email..."):
-                                            # Check total attachment size
-                                            total_size = sum(att['size'] for att in st.session_state.attachments)
-                                            if total_size > 25 * 1024 * 1024:  # 25MB total limit
-                                                st.error("❌ Total attachment size exceeds 25MB limit")
-                                            else:
-                                                success, message = send_email(
-                                                    sender_email,
-                                                    receiver_email,
-                                                    subject,
-                                                    edited_email,
-                                                    smtp_password,
-                                                    provider=email_provider,
-                                                    template=email_template,
-                                                    attachments=st.session_state.attachments
-                                                )
-                                            
-                                            if success:
-                                                st.success(message)
-                                                # Save successful template for future use
-                                                st.session_state['last_template'] = email_template
-                                            else:
-                                                st.error(message)
-                    
-                    # Show evaluation results
-                    col1, col2 = st.columns(2)
+                # A rerun with the same prompt and settings keeps the current draft instead of calling the API again
+                prompt_hash = hashlib.blake2b(
+                    f"{model}\0{max_tokens}\0{temperature}\0{prompt}".encode(), digest_size=16
+                ).hexdigest()
+                if st.session_state.get("last_prompt_hash") != prompt_hash:
+                    st.session_state.pop("last_prompt_hash", None)
+                    st.session_state.pop("last_result", None)
                     
-                    with col1:
-                        if evaluation['all_points_covered']:
-                            st.success(f"✅ All key points covered! ({evaluation['coverage_percentage']:.1f}%)")
-                        else:
-                            st.warning(f"⚠️ Coverage: {evaluation['coverage_percentage']:.1f}%")
-                            st.info(f"Missing points: {', '.join(evaluation['missing_points'])}")
+                    # Generate the reply, streamed as it arrives; the draft section below shows the result
+                    stream_view = st.empty()
+                    response = generate_email(prompt, model, max_tokens, temperature, stream_view)
+                    stream_view.empty()
                     
-                    with col2:
-                        st.info(f"📊 Points found: {len(evaluation['found_points'])}/{len(evaluation['all_points'])}")
-                    
-                    st.markdown('</div>', unsafe_allow_html=True)
+                    if response:
+                        # Evaluate the reply and suggest a subject concurrently
+                        evaluation, suggested_subject = asyncio.run(analyze_draft(response, key_points))
+                        if isinstance(evaluation, Exception):
+                            raise evaluation
+                        st.session_state.last_prompt_hash = prompt_hash
+                        st.session_state.last_result = (response, evaluation, suggested_subject)
+                        st.session_state.draft_headers = (sender_email, receiver_email, subject)
+                    else:
+                        st.error("❌ Failed to generate email. Please try again.")
             except Exception as e:
                 st.error(f"❌ An error occurred: {str(e)}")
                 st.info("💡 Please check your API key and try again.")
 
-elif submitted and not key_points:
-    st.warning("⚠️ Please enter some key points to generate an email.")
+# The current draft is drawn on every rerun, not only the submitting one, so its
+# Send and Add to Outbox buttons still work after they are clicked
+if 'last_result' in st.session_state:
+    response, evaluation, suggested_subject = st.session_state.last_result
+    draft_sender, draft_receiver, draft_subject = st.session_state.draft_headers
+    email_provider = st.session_state.get("email_provider", "gmail")
+    email_template = st.session_state.get("email_template", "default")
+    
+    st.markdown('<div class="main-card">', unsafe_allow_html=True)
+    st.subheader("📧 Generated Email")
+    st.markdown(
+        render_email_card(draft_sender, draft_receiver, draft_subject, response),
+        unsafe_allow_html=True
+    )
+    
+    if isinstance(suggested_subject, Exception):
+        st.caption(f"⚠️ No subject suggestion: {suggested_subject}")
+    else:
+        st.caption(f"💡 Suggested subject: {suggested_subject.strip()}")
+    
+    # Add send button
+    col_edit, col_send = st.columns([3, 1])
+    with col_edit:
+        # Keyed by the prompt so edits survive reruns and a new draft starts fresh
+        edited_email = st.text_area(
+            "✏️ Edit Email",
+            value=response,
+            height=300,
+            key=f"edited_email_{st.session_state.last_prompt_hash}"
+        )
+    with col_send:
+        send_clicked = st.button("📧 Send Email")
+        queue_clicked = st.button("📥 Add to Outbox")
+        if send_clicked or queue_clicked:
+            settings = get_settings()
+            smtp_password = settings.smtp_password
+            smtp_host = st.session_state.get("smtp_host") or settings.smtp_host
+            smtp_port = st.session_state.get("smtp_port") or settings.smtp_port
+            
+            # Check password, addresses and custom SMTP settings together
+            errors = validate_send(
+                smtp_password,
+                draft_sender,
+                draft_receiver,
+                email_provider,
+                smtp_host,
+                smtp_port
+            )
+            for error in errors:
+                st.error(f"❌ {error}")
+            
+            if not errors:
+                # Check total attachment size
+                if st.session_state.attachments_total_size > 25 * 1024 * 1024:  # 25MB total limit
+                    st.error("❌ Total attachment size exceeds 25MB limit")
+                else:
+                    email_kwargs = dict(
+                        sender_email=draft_sender,
+                        receiver_email=draft_receiver,
+                        subject=draft_subject,
+                        body=edited_email,
+                        smtp_password=smtp_password,
+                        provider=email_provider,
+                        template=email_template,
+                        attachments=list(st.session_state.attachments),
+                        smtp_server=(smtp_host, int(smtp_port)) if email_provider == "custom" else None
+                    )
+                    if queue_clicked:
+                        st.session_state.outbox.append(email_kwargs)
+                        st.info(f"📥 Added to outbox ({len(st.session_state.outbox)} queued)")
+                    else:
+                        # Send in the background; the status panel below reports the result
+                        future = get_send_executor().submit(send_email, **email_kwargs)
+                        st.session_state.send_job = (future, email_template)
+                        st.session_state.pop("send_result", None)
+    
+    # Show evaluation results
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if evaluation['all_points_covered']:
+            st.success(f"✅ All key points covered! ({evaluation['coverage_percentage']:.1f}%)")
+        else:
+            st.warning(f"⚠️ Coverage: {evaluation['coverage_percentage']:.1f}%")
+            st.info(f"Missing points: {', '.join(evaluation['missing_points'])}")
+    
+    with col2:
+        st.info(f"📊 Points found: {len(evaluation['found_points'])}/{len(evaluation['all_points'])}")
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# Report background sends as they finish
+send_status()
 
 # Sidebar with additional features
 with st.sidebar:
     st.markdown("### 🛠️ Settings")
     
     # API Status
-    api_key = os.getenv('GROQ_API_KEY')
-    smtp_password = os.getenv('SMTP_PASSWORD')
+    settings = get_settings()
+    api_key = settings.groq_key
+    smtp_password = settings.smtp_password
     
     if api_key:
         st.success("✅ API Key Configured")
@@ -1029,6 +1396,12 @@ with st.sidebar:
         st.error("❌ API Key Missing")
         st.info("Add your GROQ_API_KEY to the .env file")
     
+    if st.button("🔄 Reload Config", help="Re-read .env and secrets after editing them"):
+        load_dotenv(override=True)
+        get_settings.clear()
+        get_groq_client.clear()
+        st.rerun()
+    
     # Email Settings
     st.markdown("#### 📧 Email Settings")
     
@@ -1036,21 +1409,21 @@ with st.sidebar:
     email_provider = st.selectbox(
         "📫 Email Provider",
         options=["gmail", "outlook", "yahoo", "custom"],
-        help="Select your email service provider"
+        help="Select your email service provider",
+        key="email_provider"
     )
     
     if email_provider == "custom":
-        smtp_host = st.text_input("SMTP Host", placeholder="smtp.example.com")
-        smtp_port = st.number_input("SMTP Port", value=587, min_value=1, max_value=65535)
-        if smtp_host and smtp_port:
-            st.secrets["SMTP_HOST"] = smtp_host
-            st.secrets["SMTP_PORT"] = smtp_port
+        # Kept in session_state for the send handler; st.secrets is read-only
+        st.text_input("SMTP Host", value=settings.smtp_host or "", placeholder="smtp.example.com", key="smtp_host")
+        st.number_input("SMTP Port", value=settings.smtp_port or 587, min_value=1, max_value=65535, key="smtp_port")
     
     # Email Template Selection
     email_template = st.selectbox(
         "📝 Email Template",
         options=["default", "formal", "newsletter", "meeting", "thank_you"],
-        help="Choose an email template style"
+        help="Choose an email template style",
+        key="email_template"
     )
     
     # Template description
@@ -1091,7 +1464,8 @@ with st.sidebar:
     # Model selection
     model = st.selectbox(
         "🤖 AI Model",
-        options=["llama-3.1-8b-instant", "llama-3.1-70b-versatile"],
+        options=["llama-3.1-8b-instant", "llama-3.3-70b-versatile"],
+        key="model",
         help="Choose the AI model for generation"
     )
     
@@ -1101,7 +1475,8 @@ with st.sidebar:
         min_value=100,
         max_value=2000,
         value=1000,
-        step=100
+        step=100,
+        key="max_tokens"
     )
     
     st.markdown("---")
@@ -1,3 +1,102 @@
+import re
+import smtplib
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# Flush-left so no indentation is sent to the model as prompt tokens
+_PROMPT_TEMPLATE = """Please draft a professional email with the following key points:
+
+{points}
+
+Tone: {tone}{context}
+
+Write a clear, courteous, well-structured email that covers every key point."""
+
+@lru_cache(maxsize=256)
+def is_valid_email(email: str) -> bool:
+    '''
+    Validate email address format.
+    
+    Args:
+        email (str): The address to check
+        
+    Returns:
+        bool: True if the address looks like a valid email address
+    '''
+    return _EMAIL_RE.match(email) is not None
+
+def validate_send(smtp_password: Optional[str], sender_email: str, receiver_email: str,
+                  provider: str, smtp_host: Optional[str] = None, smtp_port: Optional[int] = None) -> List[str]:
+    '''
+    Check every precondition for sending an email at once.
+    
+    Args:
+        smtp_password (str, optional): SMTP password or app password
+        sender_email (str): The sender's email address
+        receiver_email (str): The recipient's email address
+        provider (str): Email provider name (e.g., "gmail", "custom")
+        smtp_host (str, optional): SMTP host, required for the "custom" provider
+        smtp_port (int, optional): SMTP port, required for the "custom" provider
+        
+    Returns:
+        List[str]: Error messages; empty if the email can be sent
+    '''
+    errors = []
+    
+    if not smtp_password:
+        errors.append("SMTP Password not configured. Please add SMTP_PASSWORD to your .env file.")
+    if not is_valid_email(sender_email):
+        errors.append("Invalid sender email address format.")
+    if not is_valid_email(receiver_email):
+        errors.append("Invalid recipient email address format.")
+    if provider == "custom" and not (smtp_host and smtp_port):
+        errors.append("Custom SMTP settings are not configured.")
+    
+    return errors
+
+def send_batch(pool, address: tuple, sender_email: str, smtp_password: str,
+               messages: list, reset_every: int = 50) -> List[Tuple[bool, str]]:
+    '''
+    Send several messages over one pooled SMTP session.
+    
+    The session is held for the whole batch and reconnected every reset_every
+    messages. Batches of 30 or more are aborted once more than a third of the
+    messages have failed.
+    
+    Args:
+        pool: SMTP session pool providing lock, send() and discard()
+        address (tuple): (host, port) of the SMTP server
+        sender_email (str): The sender's email address
+        smtp_password (str): SMTP password or app password
+        messages (list): EmailMessage objects to send
+        reset_every (int): Number of messages to send before reconnecting
+        
+    Returns:
+        List[Tuple[bool, str]]: (success, message) for each email, in order
+    '''
+    results = []
+    failures = 0
+    
+    with pool.lock:
+        for i, message in enumerate(messages):
+            if i and i % reset_every == 0:
+                pool.discard(address, sender_email)
+            
+            try:
+                pool.send(address, sender_email, smtp_password, message)
+                results.append((True, "Email sent successfully!"))
+            except (smtplib.SMTPException, OSError) as e:
+                results.append((False, f"Failed to send email: {str(e)}"))
+                failures += 1
+                if len(messages) >= 30 and failures > len(messages) / 3:
+                    skipped = len(messages) - len(results)
+                    results.extend([(False, "Batch aborted after too many failures")] * skipped)
+                    break
+    
+    return results
+
 def build_prompt(key_points: list, tone: str, context: str = None) -> str:
     '''
     Build a prompt for the AI to generate a professional email.
@@ -10,34 +109,15 @@ def build_prompt(key_points: list, tone: str, context: str = None) -> str:
     Returns:
         str: Formatted prompt for the AI
     '''
+    return _build_prompt_cached(tuple(key_points), tone, context)
+
+@lru_cache(maxsize=128)
+def _build_prompt_cached(key_points: tuple, tone: str, context: Optional[str]) -> str:
+    '''Memoized body of build_prompt; key_points must be a tuple so it can be hashed.'''
     # Format key points as bullet points
     formatted_points = "\n".join(f"• {point}" for point in key_points)
     
-    # Build the base prompt
-    prompt = f"""
-    Please draft a professional email with the following key points:
-    
-    {formatted_points}
-    
-    Tone: {tone}
-    """
-    
-    # Add context if provided
-    if context:
-        prompt += f"""
-        
-    Additional Context:
-    {context}
-    """
-    
-    # Add instructions for email format
-    prompt += """
-    
-    Please ensure the email:
-    • Has a clear structure with introduction, body, and conclusion
-    • Maintains a professional and courteous tone
-    • Includes all key points naturally in the flow
-    • Uses clear and concise language
-    """
+    # Leave the context section out entirely when there is none
+    context_block = f"\n\nAdditional Context:\n{context}" if context else ""
     
-    return prompt.strip()
\ No newline at end of file
+    return _PROMPT_TEMPLATE.format(points=formatted_points, tone=tone, context=context_block)
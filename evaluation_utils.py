@@ -1,128 +1,179 @@
 import re
-from typing import List, Dict, Tuple
+from collections import Counter
+from typing import List, Dict, Optional, Tuple
 
-def evaluate_reply(reply: str, key_points: List[str]) -> Dict[str, bool]:
+_WORD_RE = re.compile(r'\b\w+\b')
+
+# Polite indicators
+_POLITE = frozenset([
+    'please', 'thank you', 'thanks', 'appreciate', 'grateful',
+    'kindly', 'would you', 'could you', 'may i', 'excuse me',
+    'sorry', 'apologize', 'sincerely', 'regards', 'respectfully',
+    'dear', 'hope', 'look forward', 'best wishes', 'warm regards',
+    'thank you for', 'i appreciate', 'we appreciate', 'much appreciated'
+])
+
+# Impolite indicators (red flags)
+_IMPOLITE = frozenset([
+    'must', 'need to', 'have to', 'should', 'demand', 'require',
+    'immediately', 'asap', 'urgent', 'now', 'right away'
+])
+
+_GREETINGS = frozenset(['dear', 'hello', 'hi', 'good'])
+_CLOSINGS = frozenset(['regards', 'sincerely', 'best', 'thank you'])
+
+# Every indicator phrase mapped to the categories it counts towards
+_PHRASE_TAGS = {}
+for _tag, _phrases in (('polite', _POLITE), ('impolite', _IMPOLITE),
+                       ('greeting', _GREETINGS), ('closing', _CLOSINGS)):
+    for _phrase in _phrases:
+        _PHRASE_TAGS.setdefault(_phrase, []).append(_tag)
+
+# One alternation over every phrase, longest first, inside a lookahead so a match
+# can start at every word and overlapping phrases are all seen
+_PHRASE_RE = re.compile(
+    r'(?=\b(' + '|'.join(map(re.escape, sorted(_PHRASE_TAGS, key=len, reverse=True))) + r')\b)'
+)
+
+# The lookahead only reports the longest phrase starting at a word, so each phrase
+# also stands for the shorter indicator phrases it begins with ('thank you for')
+_PHRASE_PREFIXES = {
+    phrase: frozenset(other for other in _PHRASE_TAGS
+                      if phrase == other or phrase.startswith(other + ' '))
+    for phrase in _PHRASE_TAGS
+}
+
+def _scan_phrases(words: List[str]) -> Counter:
+    """
+    Count the distinct indicator phrases of each category in one regex scan over the words.
+    
+    Overlapping phrases such as 'thank you' and 'thank you for' are both found.
+    """
+    found = set()
+    for phrase in set(_PHRASE_RE.findall(' '.join(words))):
+        found |= _PHRASE_PREFIXES[phrase]
+    
+    tally = Counter()
+    for phrase in found:
+        tally.update(_PHRASE_TAGS[phrase])
+    return tally
+
+def _check_key_points(text_lower: str, reply_words: set, key_points: Tuple[str, ...],
+                      kp_lower: Tuple[str, ...]) -> Tuple[List[str], List[str]]:
+    """Split key points into found and missing: direct inclusion, or any key word (longer than 2 chars) in the reply."""
+    found_points = []
+    missing_points = []
+    for point, point_lower in zip(key_points, kp_lower):
+        key_words = {word for word in _WORD_RE.findall(point_lower) if len(word) > 2}
+        
+        # The whole point must appear as words, not inside a longer word ('meet' in 'meeting');
+        # key words are hash lookups against the reply's word set
+        phrase_found = point_lower in text_lower and re.search(
+            r'(?<!\w)' + re.escape(point_lower) + r'(?!\w)', text_lower
+        ) is not None
+        if phrase_found or not key_words.isdisjoint(reply_words):
+            found_points.append(point)
+        else:
+            missing_points.append(point)
+    return found_points, missing_points
+
+def _check_tone(words_lower: List[str]) -> Tuple[int, int, bool]:
+    """Count polite and impolite indicators and decide whether the tone is polite."""
+    tally = _scan_phrases(words_lower)
+    polite_count = tally['polite']
+    impolite_count = tally['impolite']
+    has_formal_structure = tally['greeting'] > 0 and tally['closing'] > 0
+    
+    # At least 2 polite indicators OR formal structure, and not too many impolite phrases
+    tone_is_polite = (polite_count >= 2 or has_formal_structure) and impolite_count <= polite_count
+    return polite_count, impolite_count, tone_is_polite
+
+def analyze(reply: str, key_points: Tuple[str, ...], kp_lower: Optional[Tuple[str, ...]] = None) -> Dict:
+    """
+    Analyze a reply in a single pass for key point coverage, tone, and length.
+    
+    Args:
+        reply (str): The AI-generated reply to evaluate
+        key_points (Tuple[str, ...]): Key points that should be in the reply
+        kp_lower (Tuple[str, ...], optional): The same key points already lowercased; computed if omitted
+    
+    Returns:
+        Dict: Analysis results shared by evaluate_reply and detailed_evaluation:
+            - 'found_points': Key points that appear in the reply
+            - 'missing_points': Key points that were not found
+            - 'polite_count' / 'impolite_count': Distinct tone indicators found
+            - 'tone_is_polite': True if the tone appears polite
+            - 'word_count': Number of words in the reply
+    """
+    # Lowercase and tokenize once; both checks work on the lowered text
+    text_lower = reply.lower()
+    words = _WORD_RE.findall(text_lower)
+    if kp_lower is None:
+        kp_lower = tuple(point.lower() for point in key_points)
+    found_points, missing_points = _check_key_points(text_lower, set(words), key_points, kp_lower)
+    polite_count, impolite_count, tone_is_polite = _check_tone(words)
+    
+    return {
+        'found_points': found_points,
+        'missing_points': missing_points,
+        'polite_count': polite_count,
+        'impolite_count': impolite_count,
+        'tone_is_polite': tone_is_polite,
+        'word_count': len(reply.split())
+    }
+
+def evaluate_reply(reply: str, key_points: Tuple[str, ...], kp_lower: Optional[Tuple[str, ...]] = None) -> Dict[str, bool]:
     """
     Evaluate an AI-generated reply by checking if key points are included
     and if the tone is polite.
     
     Args:
         reply (str): The AI-generated reply to evaluate
-        key_points (List[str]): List of key points that should be in the reply
+        key_points (Tuple[str, ...]): Key points that should be in the reply
+        kp_lower (Tuple[str, ...], optional): The same key points already lowercased; computed if omitted
     
     Returns:
         Dict[str, bool]: Dictionary with evaluation results:
             - 'all_key_points_included': True if all key points are found
             - 'tone_is_polite': True if the tone appears polite
     """
-    
-    def check_key_points_included(text: str, points: List[str]) -> bool:
-        """Check if all key points appear in the text (case-insensitive)"""
-        text_lower = text.lower()
-        
-        for point in points:
-            # Convert key point to lowercase and check for partial matches
-            point_lower = point.lower()
-            
-            # Check for direct inclusion or key words from the point
-            if point_lower in text_lower:
-                continue
-            
-            # Extract key words from the point and check if they appear
-            key_words = re.findall(r'\b\w+\b', point_lower)
-            key_words = [word for word in key_words if len(word) > 2]  # Filter short words
-            
-            if key_words and any(word in text_lower for word in key_words):
-                continue
-            
-            # If we reach here, this key point wasn't found
-            return False
-        
-        return True
-    
-    def check_polite_tone(text: str) -> bool:
-        """Check if the text has a polite tone based on common polite phrases"""
-        text_lower = text.lower()
-        
-        # Polite indicators
-        polite_phrases = [
-            'please', 'thank you', 'thanks', 'appreciate', 'grateful',
-            'kindly', 'would you', 'could you', 'may i', 'excuse me',
-            'sorry', 'apologize', 'sincerely', 'regards', 'respectfully',
-            'dear', 'hope', 'look forward', 'best wishes', 'warm regards',
-            'thank you for', 'i appreciate', 'we appreciate', 'much appreciated'
-        ]
-        
-        # Impolite indicators (red flags)
-        impolite_phrases = [
-            'must', 'need to', 'have to', 'should', 'demand', 'require',
-            'immediately', 'asap', 'urgent', 'now', 'right away'
-        ]
-        
-        # Count polite and impolite indicators
-        polite_count = sum(1 for phrase in polite_phrases if phrase in text_lower)
-        impolite_count = sum(1 for phrase in impolite_phrases if phrase in text_lower)
-        
-        # Additional checks for formal structure
-        has_greeting = any(greeting in text_lower for greeting in ['dear', 'hello', 'hi', 'good'])
-        has_closing = any(closing in text_lower for closing in ['regards', 'sincerely', 'best', 'thank you'])
-        
-        # Determine if tone is polite
-        # At least 2 polite indicators OR formal structure, and not too many impolite phrases
-        is_polite = (polite_count >= 2 or (has_greeting and has_closing)) and impolite_count <= polite_count
-        
-        return is_polite
-    
-    # Perform evaluations
-    all_key_points_included = check_key_points_included(reply, key_points)
-    tone_is_polite = check_polite_tone(reply)
+    analysis = analyze(reply, key_points, kp_lower)
     
     return {
-        'all_key_points_included': all_key_points_included,
-        'tone_is_polite': tone_is_polite
+        'all_key_points_included': not analysis['missing_points'],
+        'tone_is_polite': analysis['tone_is_polite']
     }
 
-def detailed_evaluation(reply: str, key_points: List[str]) -> Dict:
+def detailed_evaluation(reply: str, key_points: Tuple[str, ...], kp_lower: Optional[Tuple[str, ...]] = None) -> Dict:
     """
     Provide a detailed evaluation with additional insights.
     
     Args:
         reply (str): The AI-generated reply to evaluate
-        key_points (List[str]): List of key points that should be in the reply
+        key_points (Tuple[str, ...]): Key points that should be in the reply
+        kp_lower (Tuple[str, ...], optional): The same key points already lowercased; computed if omitted
     
     Returns:
         Dict: Detailed evaluation results with missing points and suggestions
     """
-    basic_eval = evaluate_reply(reply, key_points)
-    
-    # Find missing key points
-    missing_points = []
-    reply_lower = reply.lower()
-    
-    for point in key_points:
-        point_lower = point.lower()
-        if point_lower not in reply_lower:
-            # Check for key words
-            key_words = re.findall(r'\b\w+\b', point_lower)
-            key_words = [word for word in key_words if len(word) > 2]
-            
-            if not any(word in reply_lower for word in key_words):
-                missing_points.append(point)
+    analysis = analyze(reply, key_points, kp_lower)
+    missing_points = analysis['missing_points']
     
     # Generate suggestions
     suggestions = []
     if missing_points:
         suggestions.append(f"Missing key points: {', '.join(missing_points)}")
     
-    if not basic_eval['tone_is_polite']:
+    if not analysis['tone_is_polite']:
         suggestions.append("Consider adding more polite language (please, thank you, etc.)")
     
-    if len(reply.split()) < 50:
+    if analysis['word_count'] < 50:
         suggestions.append("Reply might be too brief - consider adding more detail")
     
     return {
-        **basic_eval,
+        'all_key_points_included': not missing_points,
+        'tone_is_polite': analysis['tone_is_polite'],
         'missing_points': missing_points,
-        'word_count': len(reply.split()),
+        'word_count': analysis['word_count'],
         'suggestions': suggestions
     }
\ No newline at end of file
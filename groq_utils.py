@@ -1,12 +1,26 @@
 import os
 import groq
+import streamlit as st
 
-def generate_reply(prompt: str) -> str:
+@st.cache_resource
+def get_groq_client() -> groq.Groq:
     """
-    Generate a response using Groq's API with the llama3-8b-8192 model.
+    Get a Groq client that is shared across Streamlit reruns and sessions.
+    
+    Returns:
+        groq.Groq: A client authenticated with the GROQ_API_KEY environment variable
+    """
+    return groq.Groq(api_key=os.getenv("GROQ_API_KEY"))
+
+def generate_reply(prompt: str, model: str, max_tokens: int, temperature: float = 0.7) -> str:
+    """
+    Generate a response using Groq's API.
     
     Args:
         prompt (str): The input prompt to send to the model
+        model (str): The Groq model to use
+        max_tokens (int): Maximum number of tokens in the response
+        temperature (float): Controls randomness (0.0 to 1.0)
         
     Returns:
         str: The generated response from the model
@@ -14,15 +28,13 @@ def generate_reply(prompt: str) -> str:
     Raises:
         Exception: If there's an error communicating with the Groq API
     """
-    # Initialize the Groq client using API key from environment variable
-    client = groq.Groq(api_key=os.getenv("GROQ_API_KEY"))
-    
     try:
-        # Call the Groq API with specified parameters
-        completion = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        # Call the Groq API with specified parameters, reusing the cached client
+        completion = get_groq_client().chat.completions.create(
+            model=model,
             messages=[{"role": "user", "content": prompt}],
-            temperature=0.7
+            max_tokens=max_tokens,
+            temperature=temperature
         )
         
         # Extract and return the response text
@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class LLMCache:
+    """
+    In-memory LRU cache for model responses, with a per-entry time to live.
+
+    Keys are opaque strings; GroqAPIClient uses a SHA-256 of the request payload.
+    """
+
+    def __init__(self, max_entries: int = 512, default_ttl: float = 3600.0):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum number of cached responses before LRU eviction
+            default_ttl (float): Seconds an entry stays valid when set() is given no ttl
+        """
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): The request key
+
+        Returns:
+            Optional[str]: The cached response, or None if absent or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """
+        Store a response, evicting the least recently used entry when full.
+
+        Args:
+            key (str): The request key
+            value (str): The model's response
+            ttl (float, optional): Seconds until the entry expires; defaults to default_ttl
+        """
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -1,26 +1,82 @@
 import os
+import re
+import sys
+import logging
+import logging.handlers
 import json
-from groq import Groq
+import asyncio
+import threading
+import time
+import random
+import hashlib
+import functools
+import weakref
+import httpx
+from groq import Groq, AsyncGroq, RateLimitError
 from dotenv import load_dotenv
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Iterator, Tuple
+from llm_cache import LLMCache
+from rate_limiter import RateLimiter
 
-# Load environment variables from .env file
-load_dotenv()
+# Connection pool shared by each client's requests, so repeated calls skip the TCP/TLS handshake
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+# Extra attempts for a rate-limited async request, on top of the SDK's own retries
+_RATE_LIMIT_RETRIES = 4
+
+# Batch API statuses after which a batch will not change any more
+_BATCH_FINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+# Leading characters of the first message that identify a shared prompt prefix
+_PROMPT_CACHE_PREFIX_CHARS = 512
+
+log = logging.getLogger("smartoffice")
+
+# The .env file is read on first need rather than at import
+_dotenv_loaded = False
+
+def _getenv_with_dotenv(name: str) -> Optional[str]:
+    """Read an environment variable, loading the .env file the first time it is missing"""
+    global _dotenv_loaded
+    value = os.getenv(name)
+    if value is None and not _dotenv_loaded:
+        _dotenv_loaded = True
+        load_dotenv()
+        value = os.getenv(name)
+    return value
 
 class GroqAPIClient:
     """
     A client class for interacting with the Groq API.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    # (fetched_at, model ids) shared by all clients; the model list changes rarely
+    _models_cache: Optional[tuple] = None
+    _models_lock = threading.Lock()
+    _models_ttl = 3600.0
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cache: Optional[LLMCache] = None,
+        http_client: Optional[httpx.Client] = None,
+        rpm: Optional[int] = 500,
+        tpm: Optional[int] = 200_000
+    ):
         """
         Initialize the Groq API client.
         
         Args:
             api_key (str, optional): Your Groq API key. If not provided, 
                                    it will be loaded from GROQ_API_KEY environment variable.
+            cache (LLMCache, optional): Exact-match response cache. Only requests with
+                                   temperature <= cache_max_temperature are cached.
+            http_client (httpx.Client, optional): HTTP client for synchronous requests. Defaults
+                                   to a pooled client that keeps up to 20 idle connections alive.
+            rpm (int, optional): Requests per minute allowed for async requests; None for no limit
+            tpm (int, optional): Tokens per minute allowed for async requests; None for no limit
         """
-        self.api_key = api_key or os.getenv('GROQ_API_KEY')
+        self.api_key = api_key or _getenv_with_dotenv('GROQ_API_KEY')
         
         if not self.api_key:
             raise ValueError(
@@ -28,13 +84,83 @@ class GroqAPIClient:
                 "or pass it directly to the constructor."
             )
         
-        # Initialize the Groq client
-        self.client = Groq(api_key=self.api_key)
+        # Initialize the Groq client; async clients are created per event loop by _async_client
+        self.client = Groq(api_key=self.api_key, http_client=http_client or httpx.Client(limits=_HTTP_LIMITS))
+        self._aclients = weakref.WeakKeyDictionary()
         
         # Default model and parameters
         self.default_model = "llama-3.1-8b-instant"
         self.default_max_tokens = 1024
         self.default_temperature = 0.7
+        
+        # Sampled output is not worth replaying, so only near-deterministic requests are cached
+        self.cache = cache
+        self.cache_max_temperature = 0.01
+        
+        # Paces concurrent async requests so a batch does not run into the API quota
+        self.limiter = RateLimiter(rpm, tpm)
+        
+        # Routing key for provider-side prefix caching. Opt-in: set a namespace (e.g.
+        # "smartoffice-email-v1") only once the API is known to accept prompt_cache_key,
+        # since unknown request fields may be rejected. Groq caches prefixes without it
+        self.cache_key_namespace = None
+    
+    def _async_client(self) -> AsyncGroq:
+        """
+        The async client for the running event loop.
+        
+        Pooled connections belong to the loop that opened them, so each asyncio.run
+        gets its own client instead of reusing one from an earlier, closed loop.
+        """
+        loop = asyncio.get_running_loop()
+        aclient = self._aclients.get(loop)
+        if aclient is None:
+            aclient = AsyncGroq(api_key=self.api_key, http_client=httpx.AsyncClient(limits=_HTTP_LIMITS))
+            self._aclients[loop] = aclient
+        return aclient
+    
+    def _prompt_cache_body(self, messages: List[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        """
+        Extra request fields asking the provider to reuse its cache of the shared prompt prefix.
+        
+        The key hashes only the start of the first message, so prompts that open with the
+        same instructions (a system message, or build_prompt's static prefix) share a key.
+        """
+        if self.cache_key_namespace is None:
+            return None
+        prefix = messages[0]["content"][:_PROMPT_CACHE_PREFIX_CHARS]
+        digest = hashlib.sha1(prefix.encode()).hexdigest()[:16]
+        return {"prompt_cache_key": f"{self.cache_key_namespace}:{digest}"}
+    
+    def _cache_key(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> Optional[str]:
+        """SHA-256 of the request payload, or None if this request should not be cached"""
+        if self.cache is None or temperature > self.cache_max_temperature:
+            return None
+        payload = json.dumps({
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def _cache_lookup(
+        self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """The request's cache key and its cached response; either is None if absent"""
+        key = self._cache_key(model, messages, temperature, max_tokens)
+        if key is None:
+            return None, None
+        return key, self.cache.get(key)
+    
+    @staticmethod
+    def _build_messages(prompt: str, system_message: Optional[str] = None) -> List[Dict[str, str]]:
+        """The chat messages for a single prompt, led by the system message if one is given"""
+        messages = []
+        if system_message:
+            messages.append({"role": "system", "content": system_message})
+        messages.append({"role": "user", "content": prompt})
+        return messages
     
     def send_prompt(
         self, 
@@ -58,41 +184,143 @@ class GroqAPIClient:
             str: The AI's response text
             
         Raises:
-            Exception: If the API request fails
+            groq.APIError: If the API request fails
         """
-        try:
-            # Use provided parameters or fall back to defaults
-            model = model or self.default_model
-            max_tokens = max_tokens or self.default_max_tokens
-            temperature = temperature or self.default_temperature
-            
-            # Prepare messages
-            messages = []
-            
-            if system_message:
-                messages.append({
-                    "role": "system",
-                    "content": system_message
-                })
-            
-            messages.append({
-                "role": "user",
-                "content": prompt
-            })
+        return "".join(self.stream_prompt(prompt, model, max_tokens, temperature, system_message))
+    
+    def stream_prompt(
+        self, 
+        prompt: str, 
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        system_message: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Send a prompt to the Groq API and yield the response text as it is generated.
+        
+        Takes the same arguments as send_prompt. A cached response is yielded whole.
+        
+        Yields:
+            str: Successive pieces of the AI's response text
             
-            # Make the API request
-            completion = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
+        Raises:
+            groq.APIError: If the API request fails
+        """
+        # Use provided parameters or fall back to defaults
+        model = model or self.default_model
+        max_tokens = max_tokens or self.default_max_tokens
+        temperature = self.default_temperature if temperature is None else temperature
+        
+        messages = self._build_messages(prompt, system_message)
+        
+        # Serve repeated deterministic requests from the cache
+        key, cached = self._cache_lookup(model, messages, temperature, max_tokens)
+        if cached is not None:
+            yield cached
+            return
+        
+        # Make the streaming API request
+        stream = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            extra_body=self._prompt_cache_body(messages),
+            stream=True
+        )
+        
+        # Pass each piece on as it arrives; cache the full response once complete
+        pieces = []
+        for chunk in stream:
+            piece = chunk.choices[0].delta.content or ""
+            pieces.append(piece)
+            yield piece
+        
+        content = "".join(pieces)
+        if key is not None:
+            self.cache.set(key, content)
+    
+    async def asend_prompt(
+        self, 
+        prompt: str, 
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        system_message: Optional[str] = None
+    ) -> str:
+        """
+        Send a prompt to the Groq API without blocking the event loop.
+        
+        Takes the same arguments as send_prompt.
+        
+        Returns:
+            str: The AI's response text
             
-            # Extract and return the response
-            return completion.choices[0].message.content
+        Raises:
+            groq.APIError: If the API request fails
+        """
+        # Use provided parameters or fall back to defaults
+        model = model or self.default_model
+        max_tokens = max_tokens or self.default_max_tokens
+        temperature = self.default_temperature if temperature is None else temperature
+        
+        messages = self._build_messages(prompt, system_message)
+        
+        # Serve repeated deterministic requests from the cache
+        key, cached = self._cache_lookup(model, messages, temperature, max_tokens)
+        if cached is not None:
+            return cached
+        
+        # Make the API request, paced to the rate limits and retried with backoff on 429s
+        estimated_tokens = sum(len(message["content"]) for message in messages) // 4 + max_tokens
+        for attempt in range(_RATE_LIMIT_RETRIES + 1):
+            await self.limiter.acquire(estimated_tokens)
+            try:
+                completion = await self._async_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    extra_body=self._prompt_cache_body(messages)
+                )
+                break
+            except RateLimitError:
+                if attempt == _RATE_LIMIT_RETRIES:
+                    raise
+                await asyncio.sleep(min(30.0, 2 ** attempt) + random.uniform(0, 1))
+        
+        # Extract and return the response
+        content = completion.choices[0].message.content
+        if key is not None:
+            self.cache.set(key, content)
+        return content
+    
+    async def _bounded(self, sem: asyncio.Semaphore, prompt: str, **kwargs) -> str:
+        async with sem:
+            return await self.asend_prompt(prompt, **kwargs)
+    
+    async def abatch(self, prompts: List[str], max_concurrency: int = 10, **kwargs) -> List:
+        """
+        Send several prompts concurrently.
+        
+        This is the concurrent batch entry point; synchronous callers can use
+        asyncio.run(client.abatch(...)), or run_batch for the Batch API.
+        
+        Args:
+            prompts (List[str]): The prompts to send
+            max_concurrency (int): Maximum number of requests in flight at once
+            **kwargs: Extra arguments passed to asend_prompt (model, temperature, ...)
             
-        except Exception as e:
-            raise Exception(f"Failed to get response from Groq API: {str(e)}")
+        Returns:
+            List: One entry per prompt, in order; the response text, or the
+                  exception raised for that prompt
+        """
+        sem = asyncio.Semaphore(max_concurrency)
+        return await asyncio.gather(
+            *(self._bounded(sem, prompt, **kwargs) for prompt in prompts),
+            return_exceptions=True
+        )
     
     def send_conversation(
         self, 
@@ -114,27 +342,154 @@ class GroqAPIClient:
             str: The AI's response text
             
         Raises:
-            Exception: If the API request fails
+            groq.APIError: If the API request fails
+        """
+        # Use provided parameters or fall back to defaults
+        model = model or self.default_model
+        max_tokens = max_tokens or self.default_max_tokens
+        temperature = self.default_temperature if temperature is None else temperature
+        
+        # Serve repeated deterministic requests from the cache
+        key, cached = self._cache_lookup(model, messages, temperature, max_tokens)
+        if cached is not None:
+            return cached
+        
+        # Make the API request
+        completion = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            extra_body=self._prompt_cache_body(messages)
+        )
+        
+        # Extract and return the response
+        content = completion.choices[0].message.content
+        if key is not None:
+            self.cache.set(key, content)
+        return content
+    
+    def submit_batch(
+        self,
+        prompts: List[str],
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        system_message: Optional[str] = None
+    ) -> str:
         """
-        try:
-            # Use provided parameters or fall back to defaults
-            model = model or self.default_model
-            max_tokens = max_tokens or self.default_max_tokens
-            temperature = temperature or self.default_temperature
+        Submit prompts to Groq's Batch API, for bulk work that does not need an immediate answer.
+        
+        Args:
+            prompts (List[str]): The user prompts to send
+            model (str, optional): The model to use
+            max_tokens (int, optional): Maximum number of tokens in each response
+            temperature (float, optional): Controls randomness (0.0 to 1.0)
+            system_message (str, optional): System message to set AI behavior
             
-            # Make the API request
-            completion = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
+        Returns:
+            str: The batch ID, for poll_batch and fetch_batch_results
+        """
+        model = model or self.default_model
+        max_tokens = max_tokens or self.default_max_tokens
+        temperature = self.default_temperature if temperature is None else temperature
+        
+        # One JSONL request line per prompt; custom_id is the prompt's index
+        lines = []
+        for i, prompt in enumerate(prompts):
+            messages = self._build_messages(prompt, system_message)
+            lines.append(json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model,
+                    "messages": messages,
+                    "max_tokens": max_tokens,
+                    "temperature": temperature
+                }
+            }))
+        
+        input_file = self.client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode()),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+    
+    def poll_batch(self, batch_id: str, timeout: float = 3600.0, interval: float = 10.0) -> str:
+        """
+        Wait for a batch to finish.
+        
+        Args:
+            batch_id (str): ID returned by submit_batch
+            timeout (float): Seconds to wait before giving up
+            interval (float): Seconds between status checks
             
-            # Extract and return the response
-            return completion.choices[0].message.content
+        Returns:
+            str: The batch's last status ("completed", "failed", "expired", "cancelled",
+                 or an in-progress status if the timeout ran out)
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            status = self.client.batches.retrieve(batch_id).status
+            if status in _BATCH_FINAL_STATUSES or time.monotonic() >= deadline:
+                return status
+            time.sleep(interval)
+    
+    def fetch_batch_results(self, batch_id: str) -> Dict[int, str]:
+        """
+        Collect the responses of a completed batch.
+        
+        Args:
+            batch_id (str): ID returned by submit_batch
             
-        except Exception as e:
-            raise Exception(f"Failed to get response from Groq API: {str(e)}")
+        Returns:
+            Dict[int, str]: Response text by prompt index; prompts that failed are absent
+        """
+        batch = self.client.batches.retrieve(batch_id)
+        if not batch.output_file_id:
+            return {}
+        
+        results = {}
+        for line in self.client.files.content(batch.output_file_id).text().splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") == 200:
+                results[int(record["custom_id"])] = response["body"]["choices"][0]["message"]["content"]
+        return results
+    
+    def run_batch(self, prompts: List[str], timeout: float = 3600.0, **kwargs) -> List:
+        """
+        Run prompts through the Batch API, falling back to concurrent requests
+        for any prompt that has no result once timeout has passed.
+        
+        Args:
+            prompts (List[str]): The user prompts to send
+            timeout (float): Seconds to wait for the batch before falling back
+            **kwargs: Extra arguments (model, max_tokens, temperature, system_message)
+            
+        Returns:
+            List: One entry per prompt, in order; the response text, or the
+                  exception raised for that prompt
+        """
+        batch_id = self.submit_batch(prompts, **kwargs)
+        status = self.poll_batch(batch_id, timeout)
+        if status not in _BATCH_FINAL_STATUSES:
+            self.client.batches.cancel(batch_id)
+        
+        results = self.fetch_batch_results(batch_id) if status == "completed" else {}
+        missing = [i for i in range(len(prompts)) if i not in results]
+        if missing:
+            retried = asyncio.run(self.abatch([prompts[i] for i in missing], **kwargs))
+            results.update(zip(missing, retried))
+        return [results[i] for i in range(len(prompts))]
     
     def get_available_models(self) -> List[str]:
         """
@@ -143,18 +498,41 @@ class GroqAPIClient:
         Returns:
             List[str]: List of available model names
         """
-        try:
-            models = self.client.models.list()
-            return [model.id for model in models.data]
-        except Exception as e:
-            print(f"Error fetching models: {str(e)}")
-            # Return commonly available models as fallback
-            return [
-                "llama-3.1-8b-instant",
-                "llama-3.3-70b-versatile", 
-                "gemma2-9b-it",
-                "deepseek-r1-distill-llama-70b"
-            ]
+        # Hold the lock while refreshing so concurrent callers wait for one fetch
+        with GroqAPIClient._models_lock:
+            cached = GroqAPIClient._models_cache
+            if cached is not None and time.monotonic() - cached[0] < self._models_ttl:
+                return list(cached[1])
+            
+            try:
+                models = self.client.models.list()
+                model_ids = [model.id for model in models.data]
+                GroqAPIClient._models_cache = (time.monotonic(), model_ids)
+                return list(model_ids)
+            except Exception as e:
+                log.warning("Error fetching models: %s", e)
+                # Return commonly available models as fallback (not cached, so the next call retries)
+                return [
+                    "llama-3.1-8b-instant",
+                    "llama-3.3-70b-versatile", 
+                    "gemma2-9b-it",
+                    "deepseek-r1-distill-llama-70b"
+                ]
+
+
+# Instructions shared by every email prompt. They come before the per-email details
+# so that provider-side prefix caching can reuse them across requests.
+_HEADER = "Please draft a professional email reply with the following specifications:"
+_REQUIREMENTS = """REQUIREMENTS:
+- Use a professional email format with appropriate greeting and closing
+- Ensure all key points are naturally incorporated into the message
+- Maintain the specified tone throughout
+- Keep the email concise but comprehensive
+- Use proper business email etiquette
+- Do not include placeholder text like [Your Name] - provide a complete email body only
+
+Please provide only the email content (subject line and body) without any additional commentary."""
+_PROMPT_PREFIX = f"{_HEADER}\n\n{_REQUIREMENTS}"
 
 
 def build_prompt(key_points: List[str], tone: str, context: Optional[str] = None) -> str:
@@ -175,38 +553,23 @@ def build_prompt(key_points: List[str], tone: str, context: Optional[str] = None
         >>> context = "Follow-up to client meeting request"
         >>> prompt = build_prompt(key_points, tone, context)
     """
-    # Format key points into a numbered list
-    formatted_points = "\n".join([f"{i+1}. {point}" for i, point in enumerate(key_points)])
+    points = "\n".join(f"{i}. {point}" for i, point in enumerate(key_points, 1))
+    context_block = f"\n\nCONTEXT:\n{context}" if context else ""
     
-    # Build the base prompt
-    prompt = f"""Please draft a professional email reply with the following specifications:
+    # Static scaffold first so every prompt shares the same cacheable prefix
+    return f"{_PROMPT_PREFIX}\n\nTONE: {tone.capitalize()}\n\nKEY POINTS TO INCLUDE:\n{points}{context_block}"
 
-TONE: {tone.capitalize()}
 
-KEY POINTS TO INCLUDE:
-{formatted_points}"""
-    
-    # Add context if provided
-    if context:
-        prompt += f"""
+@functools.lru_cache(maxsize=1)
+def _default_client() -> GroqAPIClient:
+    """The client shared by generate_reply and the examples, created on first use"""
+    return GroqAPIClient()
 
-CONTEXT:
-{context}"""
-    
-    # Add formatting instructions
-    prompt += """
-
-REQUIREMENTS:
-- Use a professional email format with appropriate greeting and closing
-- Ensure all key points are naturally incorporated into the message
-- Maintain the specified tone throughout
-- Keep the email concise but comprehensive
-- Use proper business email etiquette
-- Do not include placeholder text like [Your Name] - provide a complete email body only
 
-Please provide only the email content (subject line and body) without any additional commentary."""
-    
-    return prompt
+@functools.lru_cache(maxsize=1)
+def _reply_fn():
+    """send_prompt of the shared client with generate_reply's settings bound once"""
+    return functools.partial(_default_client().send_prompt, model="llama-3.1-8b-instant", temperature=0.7)
 
 
 def generate_reply(prompt: str) -> str:
@@ -220,28 +583,92 @@ def generate_reply(prompt: str) -> str:
         str: The AI's reply/response
         
     Raises:
-        Exception: If the API request fails or configuration is invalid
+        ValueError: If no API key is configured
+        groq.APIError: If the API request fails
         
     Example:
         >>> prompt = "Write a brief introduction about artificial intelligence"
         >>> reply = generate_reply(prompt)
         >>> print(reply)
     """
-    try:
-        # Initialize the Groq client
-        client = GroqAPIClient()
-        
-        # Use the send_prompt method with specified parameters
-        response = client.send_prompt(
-            prompt=prompt,
-            model="llama-3.1-8b-instant",
-            temperature=0.7
-        )
+    return _reply_fn()(prompt)
+
+
+async def agenerate_reply(prompt: str) -> str:
+    """
+    Async version of generate_reply, so several replies can be generated at once.
+    
+    Args:
+        prompt (str): The prompt string to send to the AI
         
-        return response
+    Returns:
+        str: The AI's reply/response
         
-    except Exception as e:
-        raise Exception(f"Failed to generate reply: {str(e)}")
+    Raises:
+        ValueError: If no API key is configured
+        groq.APIError: If the API request fails
+    """
+    return await _default_client().asend_prompt(
+        prompt=prompt,
+        model="llama-3.1-8b-instant",
+        temperature=0.7
+    )
+
+
+# Related terms that also count as covering a key point about a topic, in priority
+# order: a point is checked against the first topic that it mentions. Terms are
+# anchored at a word start only, so inflections ('thanks', 'confirmed') still match.
+_VARIATIONS = {
+    "thank": re.compile(r"\b(?:thank|appreciate|grateful)"),
+    "meeting": re.compile(r"\b(?:meeting|appointment|session|conference)"),
+    "confirm": re.compile(r"\b(?:confirm|acknowledge|verified|scheduled)"),
+    "report": re.compile(r"\b(?:report|document|file|attachment)"),
+    "attach": re.compile(r"\b(?:attach|include|enclosed|accompanying)"),
+}
+
+# Polite tone indicators: single words are looked up in the reply's token set,
+# phrases are searched for in the text
+_POLITE_SINGLE = frozenset({
+    "please", "thanks", "appreciate", "grateful", "kindly",
+    "sincerely", "apologize", "pardon",
+    "dear", "respected", "esteemed", "honored"
+})
+_POLITE_MULTI = (
+    # Polite expressions
+    "thank you", "would you", "could you", "may i", "if you don't mind",
+    
+    # Professional closings
+    "best regards", "kind regards", "yours truly",
+    "looking forward", "hope to hear", "please let me know",
+    
+    # Courteous phrases
+    "i hope", "i trust", "i believe", "if possible", "at your convenience",
+    "sorry for", "excuse me",
+    
+    # Professional language
+    "pleased to", "happy to", "glad to", "delighted to"
+)
+
+# Impolite indicators that would make it not polite
+_IMPOLITE_SINGLE = frozenset({
+    "must", "should", "demand", "require", "immediately", "asap", "urgent", "now",
+    "obviously", "clearly", "duh", "stupid",
+    "wrong", "error", "mistake", "fail", "bad", "terrible"
+})
+_IMPOLITE_MULTI = ("need to", "have to", "right away", "of course")
+
+_TOKEN_RE = re.compile(r"[a-z']+")
+
+_GREETING_WORDS = frozenset({"dear", "hello", "hi", "greetings"})
+_CLOSING_WORDS = frozenset({"regards", "sincerely", "thank", "best"})
+
+# Every phrase with its first word and whether it is polite, so one loop counts both
+# kinds; a phrase is only searched for when its first word is among the reply's tokens
+_TONE_PHRASES = tuple(
+    (phrase, _TOKEN_RE.match(phrase).group(), polite)
+    for polite, phrases in ((True, _POLITE_MULTI), (False, _IMPOLITE_MULTI))
+    for phrase in phrases
+)
 
 
 def evaluate_reply(reply: str, key_points: List[str]) -> tuple[bool, bool]:
@@ -263,75 +690,66 @@ def evaluate_reply(reply: str, key_points: List[str]) -> tuple[bool, bool]:
         >>> points_check, tone_check = evaluate_reply(reply, key_points)
         >>> print(f"All points: {points_check}, Polite: {tone_check}")
     """
+    return _evaluate(reply, _prepare_points(key_points))
+
+
+def evaluate_replies(replies: List[str], key_points: List[str]) -> List[tuple[bool, bool]]:
+    """
+    Evaluate many replies against the same key points.
+    
+    Equivalent to calling evaluate_reply on each reply, but the per-point work
+    (lowercasing, choosing the variation pattern) is done once for the whole batch.
+    
+    Args:
+        replies (List[str]): The AI's generated replies to evaluate
+        key_points (List[str]): List of key points that should appear in every reply
+        
+    Returns:
+        List[tuple[bool, bool]]: (all_points_present, is_polite_tone) for each reply
+    """
+    points = _prepare_points(key_points)
+    return [_evaluate(reply, points) for reply in replies]
+
+
+def _prepare_points(key_points: List[str]) -> List[tuple]:
+    """Lowercase each key point and pick the variation pattern of the first topic it mentions"""
+    points = []
+    for point in key_points:
+        point_lower = point.lower()
+        pattern = next((p for trigger, p in _VARIATIONS.items() if trigger in point_lower), None)
+        points.append((point_lower, pattern))
+    return points
+
+
+def _evaluate(reply: str, points: List[tuple]) -> tuple[bool, bool]:
+    """evaluate_reply for key points already run through _prepare_points"""
     # Convert reply to lowercase for case-insensitive checking
     reply_lower = reply.lower()
     
-    # Check if all key points are present
+    # Check if all key points are present, stopping at the first missing one
     all_points_present = True
-    missing_points = []
     
-    for point in key_points:
-        # Check if key point (or variations) appear in the reply
-        point_lower = point.lower()
-        
-        # Check for exact match or common variations
-        point_found = False
-        
-        # Direct substring check
-        if point_lower in reply_lower:
-            point_found = True
-        else:
-            # Check for common variations and related terms
-            if "thank" in point_lower:
-                if any(word in reply_lower for word in ["thank", "appreciate", "grateful"]):
-                    point_found = True
-            elif "meeting" in point_lower:
-                if any(word in reply_lower for word in ["meeting", "appointment", "session", "conference"]):
-                    point_found = True
-            elif "confirm" in point_lower:
-                if any(word in reply_lower for word in ["confirm", "acknowledge", "verified", "scheduled"]):
-                    point_found = True
-            elif "report" in point_lower:
-                if any(word in reply_lower for word in ["report", "document", "file", "attachment"]):
-                    point_found = True
-            elif "attach" in point_lower:
-                if any(word in reply_lower for word in ["attach", "include", "enclosed", "accompanying"]):
-                    point_found = True
+    for point_lower, pattern in points:
+        # Direct substring check, then the related terms of the first topic the point mentions
+        point_found = point_lower in reply_lower or (
+            pattern is not None and pattern.search(reply_lower) is not None
+        )
         
         if not point_found:
             all_points_present = False
-            missing_points.append(point)
+            break
     
-    # Check for polite tone indicators
-    polite_indicators = [
-        # Polite expressions
-        "please", "thank you", "thanks", "appreciate", "grateful",
-        "kindly", "would you", "could you", "may i", "if you don't mind",
-        
-        # Professional closings
-        "best regards", "sincerely", "kind regards", "yours truly",
-        "looking forward", "hope to hear", "please let me know",
-        
-        # Courteous phrases
-        "i hope", "i trust", "i believe", "if possible", "at your convenience",
-        "sorry for", "apologize", "excuse me", "pardon",
-        
-        # Professional language
-        "dear", "respected", "esteemed", "honored", "pleased to",
-        "happy to", "glad to", "delighted to"
-    ]
-    
-    # Check for impolite indicators that would make it not polite
-    impolite_indicators = [
-        "must", "need to", "have to", "should", "demand", "require",
-        "immediately", "asap", "urgent", "now", "right away",
-        "obviously", "clearly", "of course", "duh", "stupid",
-        "wrong", "error", "mistake", "fail", "bad", "terrible"
-    ]
-    
-    # Count polite vs impolite indicators
-    polite_count = sum(1 for indicator in polite_indicators if indicator in reply_lower)
-    impolite_count = sum(1 for indicator in impolite_indicators if indicator in reply_lower)
+    # Count polite vs impolite indicators: hashed lookups for words, and a substring
+    # search only for the phrases whose first word the reply contains
+    tokens = frozenset(_TOKEN_RE.findall(reply_lower))
+    polite_count = len(tokens & _POLITE_SINGLE)
+    impolite_count = len(tokens & _IMPOLITE_SINGLE)
+    for phrase, first_word, polite in _TONE_PHRASES:
+        if first_word in tokens and phrase in reply_lower:
+            if polite:
+                polite_count += 1
+            else:
+                impolite_count += 1
     
     # Determine if tone is polite
     # Consider it polite if there are polite indicators and few/no impolite ones
@@ -341,8 +759,8 @@ def evaluate_reply(reply: str, key_points: List[str]) -> tuple[bool, bool]:
     # check for basic professional structure
     if polite_count == 0 and impolite_count == 0:
         # Check for basic professional email structure
-        has_greeting = any(word in reply_lower for word in ["dear", "hello", "hi", "greetings"])
-        has_closing = any(word in reply_lower for word in ["regards", "sincerely", "thank", "best"])
+        has_greeting = not tokens.isdisjoint(_GREETING_WORDS)
+        has_closing = not tokens.isdisjoint(_CLOSING_WORDS)
         
         # If it has professional structure, consider it polite
         if has_greeting or has_closing:
@@ -351,123 +769,155 @@ def evaluate_reply(reply: str, key_points: List[str]) -> tuple[bool, bool]:
     return all_points_present, is_polite_tone
 
 
+async def main_async():
+    """
+    Example usage of the GroqAPIClient and utility functions.
+    
+    The first example is streamed; the other three requests are independent, so
+    they are sent concurrently and their results printed in order once all have arrived.
+    """
+    # Share the client (and its connection pool) with generate_reply
+    groq_client = _default_client()
+    
+    log.info("🤖 Groq API Integration Ready!")
+    log.info("Available models: %s", groq_client.get_available_models())
+    log.info("-" * 50)
+    
+    # Example 1: Simple prompt, printed token by token as it is generated
+    log.info("Example 1: Simple prompt")
+    _write_stream(groq_client.stream_prompt(prompt="What is artificial intelligence?", temperature=0.5), "Response: ")
+    log.info("-" * 50)
+    
+    # Example 2 parameters: professional email drafting with build_prompt
+    key_points = [
+        "Confirm meeting scheduled for next Tuesday at 2 PM",
+        "Please bring the Q3 financial reports",
+        "We'll discuss the new marketing strategy",
+        "Conference room B has been reserved"
+    ]
+    
+    tone = "professional"
+    context = "Follow-up to client's meeting request from this morning"
+    
+    # Build the prompt
+    email_prompt = build_prompt(key_points, tone, context)
+    
+    # Example 3 prompt
+    test_prompt = "Explain the benefits of using AI in office automation in 3 bullet points."
+    
+    # Example 4 parameters: test case - build_prompt + generate_reply
+    test_key_points = ['Thank the client', 'Confirm meeting at 3 PM', 'Attach report']
+    test_tone = 'formal'
+    test_email_prompt = build_prompt(test_key_points, test_tone)
+    
+    log.info("Sending example requests concurrently...")
+    _flush_log()
+    email_response, reply, test_result = await asyncio.gather(
+        groq_client.asend_prompt(prompt=email_prompt, temperature=0.3),
+        agenerate_reply(test_prompt),
+        agenerate_reply(test_email_prompt)
+    )
+    log.info("-" * 50)
+    
+    # Example 2: Using build_prompt for email drafting
+    log.info("Example 2: Professional email drafting with build_prompt")
+    log.info("Generated prompt:")
+    log.info(email_prompt)
+    log.info("\n" + "="*50)
+    
+    log.info("AI-generated email:")
+    log.info(email_response)
+    log.info("-" * 50)
+    
+    # Example 3: Using generate_reply function
+    log.info("Example 3: Using generate_reply function")
+    log.info(f"Prompt: {test_prompt}")
+    
+    log.info("Reply from generate_reply function:")
+    log.info(reply)
+    log.info("-" * 50)
+    
+    # Example 4: Test case - build_prompt + generate_reply
+    log.info("Example 4: Test case - build_prompt + generate_reply")
+    log.info(f"Key points: {test_key_points}")
+    log.info(f"Tone: {test_tone}")
+    log.info("")
+    
+    log.info("Built prompt:")
+    log.info(test_email_prompt)
+    log.info("\n" + "="*50)
+    
+    log.info("Generated email result:")
+    log.info(test_result)
+    log.info("\n" + "="*50)
+    
+    # Evaluate the generated reply
+    log.info("Evaluating the generated reply...")
+    all_points_present, is_polite = evaluate_reply(test_result, test_key_points)
+    
+    log.info(f"✅ All key points present: {all_points_present}")
+    log.info(f"✅ Polite tone detected: {is_polite}")
+    
+    if all_points_present and is_polite:
+        log.info("🎉 Email evaluation: PASSED - High quality response!")
+    else:
+        log.info("⚠️  Email evaluation: NEEDS IMPROVEMENT")
+        if not all_points_present:
+            log.info("   - Some key points may be missing or unclear")
+        if not is_polite:
+            log.info("   - Tone could be more polite/professional")
+
+
+def _write_stream(tokens, prefix: str = "", flush_interval: float = 0.05) -> None:
+    """Write streamed tokens to stdout, flushing at most every flush_interval seconds"""
+    _flush_log()
+    sys.stdout.write(prefix)
+    last_flush = time.monotonic()
+    for token in tokens:
+        sys.stdout.write(token)
+        now = time.monotonic()
+        if now - last_flush >= flush_interval:
+            sys.stdout.flush()
+            last_flush = now
+    sys.stdout.write("\n")
+    sys.stdout.flush()
+
+
+def _flush_log() -> None:
+    for handler in log.handlers:
+        handler.flush()
+
+
 def main():
     """
-    Example usage of the GroqAPIClient and utility functions
+    Run the examples, reporting configuration problems with setup instructions
     """
+    # Buffer log lines and write them in batches instead of flushing stdout per line
+    stdout_handler = logging.StreamHandler(sys.stdout)
+    stdout_handler.setFormatter(logging.Formatter("%(message)s"))
+    buffer = logging.handlers.MemoryHandler(64, flushLevel=logging.ERROR, target=stdout_handler)
+    log.addHandler(buffer)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    
     try:
-        # Initialize the client
-        groq_client = GroqAPIClient()
-        
-        print("🤖 Groq API Integration Ready!")
-        print("Available models:", groq_client.get_available_models())
-        print("-" * 50)
-        
-        # Example 1: Simple prompt
-        print("Example 1: Simple prompt")
-        response = groq_client.send_prompt(
-            prompt="What is artificial intelligence?",
-            temperature=0.5
-        )
-        print("Response:", response)
-        print("-" * 50)
-        
-        # Example 2: Using build_prompt for email drafting
-        print("Example 2: Professional email drafting with build_prompt")
-        
-        # Define email parameters
-        key_points = [
-            "Confirm meeting scheduled for next Tuesday at 2 PM",
-            "Please bring the Q3 financial reports",
-            "We'll discuss the new marketing strategy",
-            "Conference room B has been reserved"
-        ]
-        
-        tone = "professional"
-        context = "Follow-up to client's meeting request from this morning"
-        
-        # Build the prompt
-        email_prompt = build_prompt(key_points, tone, context)
-        
-        print("Generated prompt:")
-        print(email_prompt)
-        print("\n" + "="*50)
-        
-        # Send to AI for email generation using the client
-        email_response = groq_client.send_prompt(
-            prompt=email_prompt,
-            temperature=0.3
-        )
-        
-        print("AI-generated email:")
-        print(email_response)
-        print("-" * 50)
-        
-        # Example 3: Using generate_reply function
-        print("Example 3: Using generate_reply function")
-        
-        test_prompt = "Explain the benefits of using AI in office automation in 3 bullet points."
-        
-        print(f"Prompt: {test_prompt}")
-        print("\nGenerating reply...")
-        
-        reply = generate_reply(test_prompt)
-        
-        print("Reply from generate_reply function:")
-        print(reply)
-        print("-" * 50)
-        
-        # Example 4: Test case - build_prompt + generate_reply
-        print("Example 4: Test case - build_prompt + generate_reply")
-        
-        # Test parameters as specified
-        test_key_points = ['Thank the client', 'Confirm meeting at 3 PM', 'Attach report']
-        test_tone = 'formal'
-        
-        print(f"Key points: {test_key_points}")
-        print(f"Tone: {test_tone}")
-        print()
-        
-        # Build the prompt using build_prompt function
-        test_email_prompt = build_prompt(test_key_points, test_tone)
-        
-        print("Built prompt:")
-        print(test_email_prompt)
-        print("\n" + "="*50)
-        
-        # Call generate_reply with the built prompt
-        print("Calling generate_reply...")
-        test_result = generate_reply(test_email_prompt)
-        
-        print("Generated email result:")
-        print(test_result)
-        print("\n" + "="*50)
-        
-        # Evaluate the generated reply
-        print("Evaluating the generated reply...")
-        all_points_present, is_polite = evaluate_reply(test_result, test_key_points)
-        
-        print(f"✅ All key points present: {all_points_present}")
-        print(f"✅ Polite tone detected: {is_polite}")
-        
-        if all_points_present and is_polite:
-            print("🎉 Email evaluation: PASSED - High quality response!")
-        else:
-            print("⚠️  Email evaluation: NEEDS IMPROVEMENT")
-            if not all_points_present:
-                print("   - Some key points may be missing or unclear")
-            if not is_polite:
-                print("   - Tone could be more polite/professional")
+        asyncio.run(main_async())
         
     except ValueError as e:
-        print(f"❌ Configuration Error: {e}")
-        print("\n💡 To fix this:")
-        print("1. Get your API key from: https://console.groq.com/keys")
-        print("2. Create a .env file in this directory with:")
-        print("   GROQ_API_KEY=your_api_key_here")
+        log.error(f"❌ Configuration Error: {e}")
+        log.info("\n💡 To fix this:")
+        log.info("1. Get your API key from: https://console.groq.com/keys")
+        log.info("2. Create a .env file in this directory with:")
+        log.info("   GROQ_API_KEY=your_api_key_here")
         
     except Exception as e:
-        print(f"❌ Error: {e}")
+        log.error(f"❌ Error: {e}")
+    
+    finally:
+        # Detach the handler so a repeated main() call does not print every line twice
+        _flush_log()
+        log.removeHandler(buffer)
+        buffer.close()
 
 
 if __name__ == "__main__":
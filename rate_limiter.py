@@ -0,0 +1,69 @@
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter for requests per minute and tokens per minute.
+
+    Both buckets refill continuously, so a burst up to the per-minute budget goes
+    out at once and later requests are spaced to the sustained rate. The bucket
+    state is guarded by a threading.Lock rather than an asyncio primitive, so one
+    limiter can be shared across event loops (each asyncio.run) and threads.
+    """
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            rpm (int, optional): Requests allowed per minute; None for no request limit
+            tpm (int, optional): Tokens allowed per minute; None for no token limit
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm or 0)
+        self._tokens = float(tpm or 0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Take capacity if available; otherwise return the seconds to wait before retrying"""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._updated = now
+
+            wait = 0.0
+            if self.rpm:
+                self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+                if self._requests < 1:
+                    wait = max(wait, (1 - self._requests) * 60 / self.rpm)
+            if self.tpm:
+                # A request larger than the whole budget only has to wait for a full bucket
+                tokens = min(tokens, self.tpm)
+                self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+                if self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self.tpm)
+
+            if wait == 0.0:
+                if self.rpm:
+                    self._requests -= 1
+                if self.tpm:
+                    self._tokens -= tokens
+            return wait
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """
+        Wait until a request using about this many tokens fits within both limits.
+
+        Args:
+            tokens (int): Estimated prompt plus completion tokens for the request
+        """
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait == 0.0:
+                return
+            await asyncio.sleep(wait)
@@ -1,95 +1,303 @@
 import streamlit as st
 import groq
-from evaluation_utils import evaluate_reply, detailed_evaluation
-from typing import Optional, Dict, List
+from evaluation_utils import detailed_evaluation
+from llm_cache import LLMCache
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Iterator, Tuple
 from dotenv import load_dotenv
+import asyncio
+import hashlib
+import httpx
 import os
 
-# Load environment variables
-load_dotenv()
+# Kept-alive connections let repeated generations skip the TCP/TLS handshake
+_HTTP_LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=30.0)
 
 class GroqAPIClient:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, large_prompt_model: Optional[str] = None,
+                 large_prompt_tokens: int = 800):
         self.api_key = api_key or os.getenv('GROQ_API_KEY')
         if not self.api_key:
             raise ValueError("Groq API key is required")
-        self.client = groq.Groq(api_key=self.api_key)
+        self.client = groq.Groq(
+            api_key=self.api_key,
+            http_client=httpx.Client(limits=_HTTP_LIMITS, timeout=30.0)
+        )
         self.default_model = "llama-3.1-8b-instant"
+        # Opt-in: without a large-prompt model every prompt stays on the instant model
+        self.large_prompt_model = large_prompt_model or os.getenv('GROQ_LARGE_PROMPT_MODEL')
+        self.large_prompt_tokens = large_prompt_tokens
         
-    def send_prompt(self, prompt: str, temperature: float = 0.7) -> str:
+    def pick_model(self, prompt: str) -> str:
+        # The instant model gives the fastest first token at every prompt size. A larger
+        # model may handle long context better but starts slower and costs more, so
+        # long prompts (tokens estimated at 4 characters each) only go to it when
+        # GROQ_LARGE_PROMPT_MODEL or large_prompt_model asks for it
+        if self.large_prompt_model is None or len(prompt) // 4 < self.large_prompt_tokens:
+            return self.default_model
+        return self.large_prompt_model
+        
+    def stream_prompt(self, prompt: str, temperature: float = 0.7, system: Optional[str] = None,
+                      model: Optional[str] = None, max_tokens: int = 400) -> Iterator[str]:
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
         try:
-            completion = self.client.chat.completions.create(
-                model=self.default_model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature
+            stream = self.client.chat.completions.create(
+                model=model or self.pick_model((system or "") + prompt),
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
             )
-            return completion.choices[0].message.content
+            for chunk in stream:
+                yield chunk.choices[0].delta.content or ""
         except Exception as e:
             raise Exception(f"Failed to get response from Groq API: {str(e)}")
-
-def build_prompt(key_points: List[str], tone: str, context: str = "", email_type: str = "custom") -> str:
-    # Base key points
-    key_points_text = chr(10).join('- ' + point for point in key_points)
     
-    # Email type specific templates
-    if email_type == "thank_you":
-        prompt = f"""Write a heartfelt thank you email with the following specifics:
-{key_points_text}
+    async def _acomplete(self, aclient, semaphore, prompt: str, temperature: float,
+                         system: Optional[str], model: Optional[str], max_tokens: int) -> str:
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
+        async with semaphore:
+            completion = await aclient.chat.completions.create(
+                model=model or self.pick_model((system or "") + prompt),
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        return completion.choices[0].message.content
+    
+    async def _agenerate_variants(self, prompt: str, temperatures: List[float], system: Optional[str],
+                                  model: Optional[str], max_tokens: int) -> List[str]:
+        # The async client lives only as long as this event loop, and its pool lets the
+        # concurrent requests share connections
+        async with groq.AsyncGroq(
+            api_key=self.api_key,
+            http_client=httpx.AsyncClient(limits=_HTTP_LIMITS, timeout=30.0)
+        ) as aclient:
+            semaphore = asyncio.Semaphore(4)
+            return await asyncio.gather(*(
+                self._acomplete(aclient, semaphore, prompt, t, system, model, max_tokens) for t in temperatures
+            ))
+    
+    def generate_variants(self, prompt: str, temperatures: List[float], system: Optional[str] = None,
+                          model: Optional[str] = None, max_tokens: int = 400) -> List[str]:
+        try:
+            return asyncio.run(self._agenerate_variants(prompt, temperatures, system, model, max_tokens))
+        except Exception as e:
+            raise Exception(f"Failed to get response from Groq API: {str(e)}")
 
-Tone: {tone}
-Additional Context: {context}
+# Instructions by email type, sent as the system message. They are the same for every
+# request of a type, so the provider can reuse their cached prefix across requests
+_INSTRUCTIONS = {
+    "thank_you": """Write a heartfelt thank you email based on the specifics provided.
 
-Please write a warm and appreciative email that expresses genuine gratitude. Include specific details about what you're thanking them for and how it impacted you or your work."""
-    
-    elif email_type == "new_article":
-        prompt = f"""Write an engaging email announcing a new article or news with these details:
-{key_points_text}
+Please write a warm and appreciative email that expresses genuine gratitude. Include specific details about what you're thanking them for and how it impacted you or your work.""",
 
-Tone: {tone}
-Additional Context: {context}
+    "new_article": """Write an engaging email announcing a new article or news, based on the details provided.
 
-Please write an informative and engaging email that introduces the new content. Include a compelling subject matter, key highlights, and encourage the reader to engage with the content."""
-    
-    elif email_type == "report_sharing":
-        prompt = f"""Write a professional email for sharing a report with these key elements:
-{key_points_text}
+Please write an informative and engaging email that introduces the new content. Include a compelling subject matter, key highlights, and encourage the reader to engage with the content.""",
 
-Tone: {tone}
-Additional Context: {context}
+    "report_sharing": """Write a professional email for sharing a report, based on the key elements provided.
 
-Please write a clear and organized email that introduces the report, highlights key findings or important sections, and provides context for why this report is valuable to the recipient."""
-    
-    elif email_type == "meeting_followup":
-        prompt = f"""Write a comprehensive meeting follow-up email covering:
-{key_points_text}
+Please write a clear and organized email that introduces the report, highlights key findings or important sections, and provides context for why this report is valuable to the recipient.""",
 
-Tone: {tone}
-Additional Context: {context}
+    "meeting_followup": """Write a comprehensive meeting follow-up email covering the points provided.
 
-Please write a structured follow-up email that summarizes key decisions, action items, next steps, and deadlines. Make it clear and actionable for all participants."""
-    
-    elif email_type == "project_update":
-        prompt = f"""Write a detailed project update email including:
-{key_points_text}
+Please write a structured follow-up email that summarizes key decisions, action items, next steps, and deadlines. Make it clear and actionable for all participants.""",
 
-Tone: {tone}
-Additional Context: {context}
+    "project_update": """Write a detailed project update email including the points provided.
 
-Please write an informative project update that covers current progress, achievements, challenges, next milestones, and any support needed. Keep stakeholders well-informed."""
-    
-    else:  # custom
-        prompt = f"""Write a professional email with the following key points:
-{key_points_text}
+Please write an informative project update that covers current progress, achievements, challenges, next milestones, and any support needed. Keep stakeholders well-informed.""",
+}
 
-Tone: {tone}
-Additional Context: {context}
+_DEFAULT_INSTRUCTIONS = """Write a professional email covering the key points provided.
 
 Please write a complete, well-structured email incorporating these points."""
+
+# Short forms of the instructions above, each under 20 tokens; the default, since
+# input length drives time to first token and an instruct model needs little more
+_TERSE_INSTRUCTIONS = {
+    "thank_you": "Write a warm, specific thank-you email covering every key point.",
+    "new_article": "Write an engaging email announcing new content, covering every key point.",
+    "report_sharing": "Write a clear email sharing a report and its key findings, covering every key point.",
+    "meeting_followup": "Write a meeting follow-up email listing decisions, action items and deadlines.",
+    "project_update": "Write a project update email on progress, challenges and next steps.",
+}
+
+_DEFAULT_TERSE_INSTRUCTIONS = "Write a well-structured email covering every key point."
+
+# The request-specific details, sent as the user message after the static instructions
+_DETAILS = """Tone: {tone}
+Context: {context}
+Key points:
+{key_points_text}"""
+
+def get_instructions(email_type: str = "custom", verbose: bool = False) -> str:
+    if verbose:
+        return _INSTRUCTIONS.get(email_type, _DEFAULT_INSTRUCTIONS)
+    return _TERSE_INSTRUCTIONS.get(email_type, _DEFAULT_TERSE_INSTRUCTIONS)
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def build_prompt(key_points: Tuple[str, ...], tone: str, context: str = "") -> str:
+    key_points_text = "\n".join("- " + point for point in key_points)
+    return _DETAILS.format(key_points_text=key_points_text, tone=tone, context=context)
+
+@st.cache_resource(show_spinner=False)
+def _bootstrap() -> Optional[str]:
+    """Load .env once per server process and return the Groq API key, if any"""
+    load_dotenv()
+    return os.getenv("GROQ_API_KEY")
+
+@st.cache_resource(show_spinner=False)
+def get_groq_client():
+    """Create the Groq client, and its connection pool, once per server process"""
+    api_key = _bootstrap()
+    if api_key is None:
+        # Don't keep a missing key for the life of the process; the next submit
+        # re-reads .env, so adding the key takes effect without a restart
+        _bootstrap.clear()
+    return GroqAPIClient(api_key=api_key)
+
+@st.cache_resource(show_spinner=False)
+def get_eval_executor():
+    """Background workers for evaluating generated emails, shared by all sessions"""
+    return ThreadPoolExecutor(max_workers=2)
+
+def evaluate_in_background(response: str, key_points: Tuple[str, ...], kp_lower: Tuple[str, ...]) -> Future:
+    # One analysis pass covers the quality check and statistics
+    return get_eval_executor().submit(detailed_evaluation, response, key_points, kp_lower)
+
+def show_results(response: str, evaluation: Future, key: str = "edited_email") -> None:
+    """Show the edit box right away, then the quality check and statistics once evaluation finishes"""
+    # Allow editing
+    st.text_area(
+        "✏️ Edit Email (Optional)",
+        value=response,
+        height=200,
+        help="Make any adjustments to the generated email",
+        key=key
+    )
+    
+    # Show evaluation results
+    status = st.empty()
+    status.caption("🔎 Analyzing…")
+    stats = evaluation.result()
+    status.empty()
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("📊 Quality Check")
+        if stats['all_key_points_included']:
+            st.success("✅ All key points included")
+        else:
+            st.error("❌ Some key points missing")
+        
+        if stats['tone_is_polite']:
+            st.success("✅ Polite tone detected")
+        else:
+            st.warning("⚠️ Consider more polite language")
     
-    return prompt
+    with col2:
+        st.subheader("📈 Statistics")
+        st.metric("Word Count", stats['word_count'])
+        
+        if stats['missing_points']:
+            st.write("**Missing Points:**")
+            for point in stats['missing_points']:
+                st.write(f"• {point}")
+        
+        if stats['suggestions']:
+            st.write("**Suggestions:**")
+            for suggestion in stats['suggestions']:
+                st.write(f"• {suggestion}")
+
+def client_available() -> bool:
+    """Create the client on first use, reporting a missing API key on the page instead of crashing"""
+    try:
+        get_groq_client()
+    except ValueError as e:
+        st.error(f"❌ {e}. Set GROQ_API_KEY in your environment or .env file.")
+        return False
+    return True
+
+# Sampling above this temperature is too random for a stored reply to stand in for a new one
+CACHE_MAX_TEMPERATURE = 0.3
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache():
+    """Exact-match reply cache shared by all sessions"""
+    return LLMCache(max_entries=512, default_ttl=3600.0)
+
+def show_email(placeholder, text: str) -> None:
+    """Render (possibly partial) email text into placeholder"""
+    placeholder.markdown(
+        f'<div class="generated-email"><div style="white-space: pre-wrap;">{text}</div></div>',
+        unsafe_allow_html=True
+    )
+
+def generate_email(system: str, prompt: str, temperature: float, model: str, max_tokens: int, placeholder) -> str:
+    """Generate a reply, streaming it into placeholder unless an identical request is cached"""
+    temperature = round(temperature, 1)
+    cacheable = temperature <= CACHE_MAX_TEMPERATURE
+    key = hashlib.blake2b(f"{model}\0{temperature}\0{max_tokens}\0{system}\0{prompt}".encode(), digest_size=16).hexdigest()
+    if cacheable:
+        response = get_response_cache().get(key)
+        if response is not None:
+            show_email(placeholder, response)
+            return response
+    
+    buf = []
+    for tok in get_groq_client().stream_prompt(prompt, temperature, system, model, max_tokens):
+        buf.append(tok)
+        show_email(placeholder, "".join(buf))
+    response = "".join(buf)
+    
+    if cacheable and response:
+        get_response_cache().set(key, response)
+    return response
+
+@contextmanager
+def card(name: str):
+    """A bordered container keyed card_<name>, which the [class*="st-key-card_"] rule styles as a card"""
+    with st.container(border=True, key=f"card_{name}") as container:
+        yield container
+
+# Sample key points filled in by the quick template buttons
+_TEMPLATE_EXAMPLES = {
+    "thank_you": "Thank you for your excellent work on the project\nAppreciate your dedication and effort\nLooking forward to future collaboration",
+    "new_article": "New research article published on AI trends\nShare link: www.example.com/article\nKey findings on market growth\nInvite team to review and discuss",
+    "report_sharing": "Monthly sales report attached\nRevenue increased by 15% this quarter\nKey metrics and analysis included\nSchedule review meeting next week"
+}
+
+def use_template(text: str) -> None:
+    st.session_state.key_points_text = text
 
-# Initialize Groq client
-groq_client = GroqAPIClient()
+@st.fragment
+def key_points_editor():
+    """Template buttons and the key points box; clicking or editing reruns only this fragment"""
+    st.markdown("**Quick Templates:**")
+    col_t1, col_t2, col_t3 = st.columns(3)
+    
+    with col_t1:
+        st.button("Thank You 💝", key="template_thanks", on_click=use_template, args=(_TEMPLATE_EXAMPLES["thank_you"],))
+    with col_t2:
+        st.button("New Article 📄", key="template_article", on_click=use_template, args=(_TEMPLATE_EXAMPLES["new_article"],))
+    with col_t3:
+        st.button("Report 📊", key="template_report", on_click=use_template, args=(_TEMPLATE_EXAMPLES["report_sharing"],))
+    
+    # Key points
+    st.text_area(
+        "📝 Key Points",
+        key="key_points_text",
+        placeholder="Enter the main points you want to include in your email (one per line)...",
+        height=120,
+        help="List the important topics or messages you want to convey"
+    )
 
 # Set page config
 st.set_page_config(
@@ -99,8 +307,7 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Custom CSS
-st.markdown("""
+_CSS = """
 <style>
 /* Global Styles */
 div.stApp {
@@ -111,7 +318,12 @@ div.stApp {
 }
 
 /* Override text colors for better contrast */
-.stApp * {
+.stApp p,
+.stApp label,
+.stApp h1,
+.stApp h2,
+.stApp span[data-testid],
+.stMarkdown {
     color: white !important;
 }
 
@@ -145,7 +357,7 @@ h1, h2, h3, h4, h5, h6 {
 }
 
 /* Card styling */
-.main-card {
+[class*="st-key-card_"] {
     background: rgba(255, 255, 255, 0.1) !important;
     border-radius: 15px;
     padding: 2rem;
@@ -256,11 +468,18 @@ label {
     border: 1px solid rgba(255, 255, 255, 0.3);
 }
 
-.generated-email * {
+.stApp .generated-email * {
     color: #2d3748 !important;
 }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+def inject_css():
+    """Emit the style block; called exactly once per script run"""
+    st.markdown(_CSS, unsafe_allow_html=True)
+
+# Custom CSS
+inject_css()
 
 # Main header
 st.markdown("""
@@ -271,54 +490,23 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Main content area
-with st.container():
-    st.markdown('<div class="main-card">', unsafe_allow_html=True)
-    
+with card("form"):
     # Create two columns for better layout
     col1, col2 = st.columns([2, 1])
     
     with col1:
         st.subheader("✨ Generate Professional Email")
         
-        # Quick template buttons (outside form)
-        st.markdown("**Quick Templates:**")
-        col_t1, col_t2, col_t3 = st.columns(3)
-        
-        template_examples = {
-            "thank_you": "Thank you for your excellent work on the project\nAppreciate your dedication and effort\nLooking forward to future collaboration",
-            "new_article": "New research article published on AI trends\nShare link: www.example.com/article\nKey findings on market growth\nInvite team to review and discuss",
-            "report_sharing": "Monthly sales report attached\nRevenue increased by 15% this quarter\nKey metrics and analysis included\nSchedule review meeting next week"
-        }
+        # Quick template buttons and key points (outside form)
+        key_points_editor()
         
-        with col_t1:
-            if st.button("Thank You 💝", key="template_thanks"):
-                st.session_state.template_text = template_examples["thank_you"]
-        with col_t2:
-            if st.button("New Article 📄", key="template_article"):
-                st.session_state.template_text = template_examples["new_article"]
-        with col_t3:
-            if st.button("Report 📊", key="template_report"):
-                st.session_state.template_text = template_examples["report_sharing"]
+        # Convert text to tuple, dropping blank and repeated lines
+        key_points_text = st.session_state.get("key_points_text", "")
+        key_points = tuple(dict.fromkeys(point.strip() for point in key_points_text.splitlines() if point.strip()))
         
         # Email form
         with st.form("email_form"):
             
-            # Key points
-            default_text = st.session_state.get('template_text', '')
-            key_points_text = st.text_area(
-                "📝 Key Points",
-                value=default_text,
-                placeholder="Enter the main points you want to include in your email (one per line)...",
-                height=120,
-                help="List the important topics or messages you want to convey"
-            )
-            
-            # Convert text to list
-            if key_points_text:
-                key_points = [point.strip() for point in key_points_text.split('\n') if point.strip()]
-            else:
-                key_points = []
-            
             # Email type selection
             email_type = st.selectbox(
                 "📧 Email Type",
@@ -359,6 +547,32 @@ with st.container():
                 help="Lower values = more focused, Higher values = more creative"
             )
             
+            # Reply length cap
+            max_tokens = st.slider(
+                "📏 Max Length (tokens)",
+                min_value=100,
+                max_value=1000,
+                value=400,
+                step=50,
+                help="Upper bound on the reply length; lower values finish sooner"
+            )
+            
+            # Number of drafts to generate
+            variants = st.slider(
+                "🔀 Variants",
+                min_value=1,
+                max_value=4,
+                value=1,
+                help="Generate several drafts at once to compare"
+            )
+            
+            # Instruction length
+            verbose = st.checkbox(
+                "📜 Detailed Instructions",
+                value=False,
+                help="Send the model longer writing guidance; slower to start, sometimes more polished"
+            )
+            
             # Submit button
             submitted = st.form_submit_button("🚀 Generate Email", use_container_width=True)
     
@@ -398,81 +612,50 @@ with st.container():
             <p>• Instant preview & editing</p>
         </div>
         """, unsafe_allow_html=True)
-    
-    st.markdown('</div>', unsafe_allow_html=True)
 
 # Process form submission
 if submitted:
     if not key_points:
         st.warning("⚠️ Please enter at least one key point.")
-    else:
+    elif client_available():
         with st.spinner("🤖 Generating your email..."):
             try:
                 # Build the prompt
-                prompt = build_prompt(key_points, tone, context, email_type)
-                
-                # Generate the reply
-                response = groq_client.send_prompt(prompt, temperature)
+                system = get_instructions(email_type, verbose)
+                prompt = build_prompt(key_points, tone, context)
+                kp_lower = tuple(point.lower() for point in key_points)
                 
-                if response:
-                    # Evaluate the reply
-                    evaluation = evaluate_reply(response, key_points)
-                    detailed_eval = detailed_evaluation(response, key_points)
-                    
-                    # Display results
-                    st.markdown('<div class="main-card">', unsafe_allow_html=True)
+                with card("result"):
                     st.subheader("📧 Generated Email")
+                
+                    groq_client = get_groq_client()
+                    model = groq_client.pick_model(system + prompt)
+                
+                    if variants == 1:
+                        # Generate the reply, showing the email as it streams in (served from cache for repeated inputs)
+                        placeholder = st.empty()
+                        response = generate_email(system, prompt, temperature, model, max_tokens, placeholder)
                     
-                    # Show the generated email
-                    st.markdown(f"""
-                    <div class="generated-email">
-                        <div style="white-space: pre-wrap;">
-                            {response}
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Allow editing
-                    edited_email = st.text_area(
-                        "✏️ Edit Email (Optional)",
-                        value=response,
-                        height=200,
-                        help="Make any adjustments to the generated email"
-                    )
-                    
-                    # Show evaluation results
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.subheader("📊 Quality Check")
-                        if evaluation['all_key_points_included']:
-                            st.success("✅ All key points included")
-                        else:
-                            st.error("❌ Some key points missing")
-                        
-                        if evaluation['tone_is_polite']:
-                            st.success("✅ Polite tone detected")
+                        if response:
+                            show_results(response, evaluate_in_background(response, key_points, kp_lower))
                         else:
-                            st.warning("⚠️ Consider more polite language")
-                    
-                    with col2:
-                        st.subheader("📈 Statistics")
-                        st.metric("Word Count", detailed_eval['word_count'])
-                        
-                        if detailed_eval['missing_points']:
-                            st.write("**Missing Points:**")
-                            for point in detailed_eval['missing_points']:
-                                st.write(f"• {point}")
-                        
-                        if detailed_eval['suggestions']:
-                            st.write("**Suggestions:**")
-                            for suggestion in detailed_eval['suggestions']:
-                                st.write(f"• {suggestion}")
+                            st.error("❌ Failed to generate email. Please try again.")
+                    else:
+                        # Generate every variant concurrently, each a little more creative than the last
+                        temperatures = [min(1.0, round(temperature + 0.1 * i, 1)) for i in range(variants)]
+                        responses = groq_client.generate_variants(prompt, temperatures, system, model, max_tokens)
                     
-                    st.markdown('</div>', unsafe_allow_html=True)
+                        evaluations = [evaluate_in_background(response, key_points, kp_lower) if response else None
+                                       for response in responses]
                     
-                else:
-                    st.error("❌ Failed to generate email. Please try again.")
+                        tabs = st.tabs([f"Variant {i + 1}" for i in range(variants)])
+                        for i, (tab, response) in enumerate(zip(tabs, responses)):
+                            with tab:
+                                if response:
+                                    show_email(st.empty(), response)
+                                    show_results(response, evaluations[i], key=f"edited_email_{i}")
+                                else:
+                                    st.error("❌ Failed to generate this variant. Please try again.")
                     
             except Exception as e:
                 st.error(f"❌ Error: {str(e)}")